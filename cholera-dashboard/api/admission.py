@@ -0,0 +1,78 @@
+"""
+Deadlines and admission control for forecast requests
+A Deadline is checked cooperatively between forecast steps, so a request that
+runs out of time returns the steps computed so far instead of holding a worker.
+
+ConcurrencyLimiter caps how many forecasts run at once and how many may wait
+for a slot. Requests beyond the queue are rejected immediately (429); queued
+requests that cannot start before their wait budget runs out get a 503.
+Either way the caller learns quickly instead of piling up behind slow work.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; carries the HTTP status and a Retry-After hint."""
+
+    def __init__(self, message, status, retry_after=1):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """Wall-clock budget for one request, measured from its creation."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+
+class ConcurrencyLimiter:
+    """At most `max_active` holders of a slot and `max_queue` waiters."""
+
+    def __init__(self, max_active, max_queue, queue_timeout):
+        self.max_active = max(int(max_active), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """Hold a slot for the duration of the block, or raise Overloaded."""
+        wait = self.queue_timeout
+        if deadline is not None:
+            wait = min(wait, deadline.remaining())
+
+        with self._cond:
+            if self.active >= self.max_active:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise Overloaded('Too many forecast requests in progress; retry shortly', 429)
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.active < self.max_active, timeout=wait)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.rejected += 1
+                    raise Overloaded('Forecast service is busy; request timed out waiting for a slot', 503)
+            self.active += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify()
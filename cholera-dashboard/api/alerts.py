@@ -0,0 +1,63 @@
+"""
+Vercel Serverless Function - District outbreak alerts endpoint
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.profiling import profiled_handler
+
+@profiled_handler
+def handler(request):
+    """Handle district alerts request"""
+    try:
+        from api.rf_predict import alert_params, district_alerts
+        
+        try:
+            params = alert_params(request.get('query'))
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': str(e)})
+            }
+        
+        result, error = district_alerts(params)
+        if error:
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': error})
+            }
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type'
+            },
+            'body': json.dumps(dict(result, model_type='Random Forest', timestamp=datetime.now().isoformat()))
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': str(e)})
+        }
@@ -0,0 +1,108 @@
+"""
+Training/serving feature parity check
+Builds training rows with train_rf.build_training_set and compares each one
+with what the endpoints build for the same location and prediction date,
+calling the functions the handlers call:
+
+    predict (feature store)  historical_features(data, prediction_history_end(data))
+    predict (no store)       prepare_features(data, get_historical_sequence(..., end_date=prediction_history_end(data)))
+    forecast                 run_recursive_forecast(data, history, start_date=date), first step
+
+The forecast's first step must also be labelled with the prediction date.
+Checks the dataset the API serves (CSV_DATA_PATH) and builds its feature
+store if needed.
+
+Usage: python check_features.py [--locations 20] [--rows 40]
+Exits with status 1 on any mismatch.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.features import FEATURE_NAMES, clean_series
+from api.feature_store import daily_series
+from api.train_rf import build_training_set, _level
+
+
+class _ZeroModel:
+    """Stand-in for the forecast path: the first step's features do not depend on predictions."""
+
+    def predict(self, X):
+        return np.zeros(len(X))
+
+
+def _mismatches(name, expected, actual, where):
+    bad = np.flatnonzero(~np.isclose(expected, actual, rtol=1e-9, atol=1e-9))
+    return [f"{where}: {name} differs in {FEATURE_NAMES[i]} ({expected[i]!r} vs {actual[i]!r})" for i in bad]
+
+
+def check(n_locations=20, n_rows=40, seed=0):
+    """List of mismatch descriptions (empty when training and serving agree)."""
+    from api.rf_predict import (get_historical_sequence, historical_features, load_cholera_dataset,
+                                load_feature_store, prediction_history_end, prepare_features,
+                                run_recursive_forecast)
+
+    df = load_cholera_dataset()
+    if df is None or load_feature_store(build=True) is None:
+        return ['Dataset or feature store not available']
+
+    rng = np.random.default_rng(seed)
+    locations = [key for key in daily_series(df) if _level(*key) != 'national']
+    picked = rng.choice(len(locations), size=min(n_locations, len(locations)), replace=False)
+
+    problems, checked = [], 0
+    for index in picked:
+        region, district = locations[index]
+        location_df = df[df['Region'] == region]
+        if district:
+            location_df = location_df[location_df['District'] == district]
+        X, y, _ = build_training_set(location_df, levels=(_level(region, district),))
+        dates, values = daily_series(location_df)[(region, district)]
+        values = clean_series(values)
+
+        for i in rng.choice(len(X), size=min(n_rows, len(X)), replace=False):
+            # Row i predicts dates[i + 1] from the history ending on dates[i]
+            target = pd.Timestamp(dates[i + 1]).strftime('%Y-%m-%d')
+            where = f"{region}/{district or '-'} {target}"
+            if y[i] != values[i + 1]:
+                problems.append(f"{where}: target {y[i]!r} is not the value reported that day ({values[i + 1]!r})")
+            data = {'date': target, 'region': region, 'district': district or ''}
+            history_end = prediction_history_end(data)
+
+            row, _ = historical_features(data, history_end)
+            problems += _mismatches('predict (feature store)', X[i], row[0], where)
+
+            history, _ = get_historical_sequence(region=region, district=district, end_date=history_end,
+                                                 sequence_length=60)
+            problems += _mismatches('predict (no store)', X[i], prepare_features(data, history)[0], where)
+
+            rows = []
+            forecasts = run_recursive_forecast(data, history, pd.Timestamp(target), 1, feature_rows=rows,
+                                               model=_ZeroModel())
+            if not rows or forecasts[0]['date'] != target:
+                problems.append(f"{where}: forecast step 1 is labelled {forecasts[0]['date'] if forecasts else None}")
+            else:
+                problems += _mismatches('forecast', X[i], rows[0][0], where)
+            checked += 1
+
+    print(f"Checked {checked} training rows from {len(picked)} locations against the predict and forecast paths")
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check training features against the serving paths.')
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=40, help='training rows checked per location')
+    args = parser.parse_args()
+
+    problems = check(args.locations, args.rows)
+    for problem in problems[:20]:
+        print(f"[ERROR] {problem}")
+    if problems:
+        print(f"[ERROR] {len(problems)} feature mismatches between training and serving")
+        sys.exit(1)
+    print("[OK] Training and serving features match")
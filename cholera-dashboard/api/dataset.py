@@ -0,0 +1,111 @@
+"""
+Cholera dataset loading
+Reads cholera_data3.csv into the frame used by serving and training, so both
+parse dates and coerce numerics the same way.
+
+Very large exports can be streamed instead (read_cholera_csv_chunked): the
+file is read in chunks of rows and each chunk is reduced straight into daily
+sums per (Region, District), so peak memory follows the chunk size and the
+number of location-days, not the file size.
+"""
+import pandas as pd
+
+NUMERIC_COLUMNS = ['sCh', 'cCh', 'deaths', 'CFR']
+
+# Columns summed per (Region, District, reporting_date) by the streaming reader
+SUM_COLUMNS = ['sCh', 'cCh', 'deaths']
+LOCATION_COLUMNS = ['Region', 'District']
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+
+def parse_date(date_str):
+    """Parse a reporting date (handles DD/MM/YYYY format)."""
+    if pd.isna(date_str):
+        return None
+    date_str = str(date_str).strip()
+    if '/' in date_str:
+        parts = date_str.split('/')
+        if len(parts) == 3:
+            try:
+                day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
+                return pd.Timestamp(year, month, day)
+            except:
+                pass
+    try:
+        return pd.to_datetime(date_str)
+    except:
+        return None
+
+
+def parse_dates(values):
+    """parse_date over a column, parsing each distinct string once."""
+    unique = pd.unique(values)
+    parsed = {value: parse_date(value) for value in unique}
+    return pd.to_datetime(values.map(parsed))
+
+
+def read_cholera_csv(path):
+    """Read the dataset, parse reporting dates and coerce numeric columns."""
+    df = pd.read_csv(path)
+    
+    df['reporting_date'] = parse_dates(df['reporting_date'])
+    df = df.dropna(subset=['reporting_date'])
+    df = df.sort_values('reporting_date')
+    
+    # Ensure numeric columns
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    
+    return df
+
+
+def _reduce(frame, keys):
+    return frame.groupby(keys, dropna=False, sort=False)[SUM_COLUMNS].sum().reset_index()
+
+
+def read_cholera_csv_chunked(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream the dataset into daily sums of sCh / cCh / deaths per (Region, District).
+
+    Sums compose, so every region, district or national series built from the
+    result equals the one built from read_cholera_csv. Only the columns needed
+    for the aggregates are read. The returned frame is sorted by date and its
+    attrs['source_rows'] holds the number of dated rows read.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    keys = [col for col in LOCATION_COLUMNS if col in header]
+    wanted = set(['reporting_date'] + keys + SUM_COLUMNS)
+    group_keys = keys + ['reporting_date']
+    
+    partials, pending_rows, source_rows = [], 0, 0
+    reduced = None
+    for chunk in pd.read_csv(path, usecols=lambda col: col in wanted, chunksize=chunk_rows,
+                             dtype={col: 'object' for col in keys}):
+        chunk['reporting_date'] = parse_dates(chunk['reporting_date'])
+        chunk = chunk.dropna(subset=['reporting_date'])
+        source_rows += len(chunk)
+        for col in SUM_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce').fillna(0)
+            else:
+                chunk[col] = 0.0
+        
+        partial = _reduce(chunk, group_keys)
+        partials.append(partial)
+        pending_rows += len(partial)
+        
+        # Fold the partial aggregates together once they outgrow a chunk
+        if pending_rows > chunk_rows:
+            reduced = _reduce(pd.concat(([reduced] if reduced is not None else []) + partials,
+                                        ignore_index=True), group_keys)
+            partials, pending_rows = [], 0
+    
+    frames = ([reduced] if reduced is not None else []) + partials
+    if frames:
+        df = _reduce(pd.concat(frames, ignore_index=True), group_keys)
+    else:
+        df = pd.DataFrame(columns=group_keys + SUM_COLUMNS)
+    df = df.sort_values(['reporting_date'] + keys, kind='mergesort').reset_index(drop=True)
+    df.attrs['source_rows'] = source_rows
+    return df
@@ -0,0 +1,52 @@
+"""
+Largest-Triangle-Three-Buckets downsampling
+Reduces a long (x, y) series to a fixed number of points while keeping its
+visual shape: the first and last points are kept, the rest are split into
+equal buckets, and from each bucket the point forming the largest triangle
+with the previously selected point and the next bucket's average is kept.
+
+Bucket bounds and averages are computed for all buckets at once; the scan over
+buckets (one per output point) evaluates every candidate of a bucket in a
+single array operation.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the points LTTB keeps when reducing (x, y) to n_out points."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError('n_out must be at least 3')
+
+    # Bucket b covers [bounds[b], bounds[b + 1]) of the points between first and last
+    n_buckets = n_out - 2
+    bounds = (np.arange(n_buckets + 1) * ((n - 2) / n_buckets)).astype(np.int64) + 1
+    bounds[-1] = n - 1
+
+    # Average of each bucket, plus the last point as the "next bucket" of the final one
+    counts = np.diff(bounds)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], bounds[:-1] - 1) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], bounds[:-1] - 1) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for b in range(n_buckets):
+        lo, hi = bounds[b], bounds[b + 1]
+        cx, cy = avg_x[b + 1], avg_y[b + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def lttb(x, y, n_out):
+    """(x, y) reduced to at most n_out points with LTTB."""
+    keep = lttb_indices(x, y, n_out)
+    return np.asarray(x)[keep], np.asarray(y)[keep]
@@ -0,0 +1,294 @@
+"""
+Historical feature store
+Precomputes the full 28-feature row (and the 7-day capping statistics) for
+every (location, reporting date) in the dataset, once per dataset version.
+Arrays are saved as .npy files and memory-mapped on load, so a prediction on
+a historical date is a binary search plus a row copy.
+
+Locations mirror get_historical_sequence filters: the whole country,
+each Region, and each (Region, District).
+
+Layout of <root>/<version>/:
+    features.npy    (n_rows, 28) float64
+    cap_stats.npy   (n_rows, 3)  float64   avg / max / median of the last 7 days
+    dates.npy       (n_rows,)    datetime64[D]
+    index.json      version, last_date and [region, district, start, stop] per location
+
+Build or refresh from the command line with: python feature_store.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.features import FEATURE_NAMES, FEATURE_INDEX, MAX_LOOKBACK, clean_series, series_features, set_calendar
+
+ARRAY_FILES = ('features', 'cap_stats', 'dates')
+
+# Store versions kept on disk (the current one plus the previous for rollbacks)
+KEEP_VERSIONS = 2
+
+
+def dataset_version(path, chunk_size=1 << 20):
+    """Short content hash of the dataset file."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _key(region, district):
+    return (region or None, district or None)
+
+
+def daily_series(df):
+    """{(region, district): (dates, sCh sums)} for every location, like get_historical_sequence."""
+    series = {}
+
+    national = df.groupby('reporting_date', sort=True)['sCh'].sum()
+    series[(None, None)] = (national.index.values, national.values)
+
+    if 'Region' in df.columns:
+        by_region = df.groupby(['Region', 'reporting_date'], sort=True)['sCh'].sum()
+        for region, group in by_region.groupby(level=0, sort=False):
+            series[(region, None)] = (group.index.get_level_values(1).values, group.values)
+
+        if 'District' in df.columns:
+            by_district = df.groupby(['Region', 'District', 'reporting_date'], sort=True)['sCh'].sum()
+            for (region, district), group in by_district.groupby(level=[0, 1], sort=False):
+                series[(region, district)] = (group.index.get_level_values(2).values, group.values)
+
+    return series
+
+
+class FeatureStore:
+    """Feature rows for all locations, backed by (optionally memory-mapped) arrays."""
+
+    def __init__(self, features, cap_stats, dates, index):
+        self.features = features
+        self.cap_stats = cap_stats
+        self.dates = dates
+        self.index = index
+        self.version = index['version']
+        self._locations = {
+            _key(region, district): (start, stop)
+            for region, district, start, stop in index['locations']
+        }
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        with open(os.path.join(path, 'index.json')) as f:
+            index = json.load(f)
+        if index.get('feature_names') != FEATURE_NAMES:
+            raise ValueError(f'Feature store at {path} was built for a different feature order')
+        mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode) for name in ARRAY_FILES]
+        return cls(*arrays, index)
+
+    def save(self, path):
+        """Write the store to `path`, replacing it atomically."""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=parent)
+        try:
+            for name in ARRAY_FILES:
+                np.save(os.path.join(staging, f'{name}.npy'), np.asarray(getattr(self, name)))
+            with open(os.path.join(staging, 'index.json'), 'w') as f:
+                json.dump(self.index, f)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.rename(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def __len__(self):
+        return len(self.dates)
+
+    def locations(self):
+        return list(self._locations)
+
+    def rows(self, region, district=None):
+        """(dates, features, cap_stats) views for one location, or None if unknown."""
+        span = self._locations.get(_key(region, district))
+        if span is None:
+            return None
+        start, stop = span
+        return self.dates[start:stop], self.features[start:stop], self.cap_stats[start:stop]
+
+    def lookup(self, region, district, history_end, feature_date=None):
+        """Feature row and capping stats for a history ending on `history_end`.
+
+        Equivalent to prepare_features({'date': feature_date, ...}, history) where
+        history = get_historical_sequence(region, district, end_date=history_end).
+        Returns ((1, 28) array, (avg, max, median)), or None when the request is
+        not covered by the store (no region filter).
+        """
+        feature_date = feature_date if feature_date is not None else history_end
+        span = self._locations.get(_key(region, district))
+        if span is None and not region:
+            return None
+
+        i = -1
+        if span is not None:
+            start, stop = span
+            end = np.datetime64(pd.Timestamp(history_end).normalize().date(), 'D')
+            i = int(np.searchsorted(self.dates[start:stop], end, side='right')) - 1
+
+        if i < 0:
+            # No reports up to history_end: all-zero history
+            row, stats = series_features(np.zeros(1), [feature_date], region, district)
+            return row, tuple(stats[0])
+
+        row = np.array(self.features[start + i:start + i + 1])
+        set_calendar(row, feature_date)
+        return row, tuple(float(x) for x in self.cap_stats[start + i])
+
+
+def _assemble(blocks, version):
+    """Concatenate per-location (key, dates, features, cap_stats) blocks into a store."""
+    locations, offset = [], 0
+    for (region, district), dates, _, _ in blocks:
+        locations.append([region, district, offset, offset + len(dates)])
+        offset += len(dates)
+
+    if blocks:
+        dates = np.concatenate([b[1] for b in blocks]).astype('datetime64[D]')
+        features = np.concatenate([b[2] for b in blocks])
+        cap_stats = np.concatenate([b[3] for b in blocks])
+    else:
+        dates = np.zeros(0, dtype='datetime64[D]')
+        features = np.zeros((0, len(FEATURE_NAMES)))
+        cap_stats = np.zeros((0, 3))
+
+    index = {
+        'version': version,
+        'feature_names': FEATURE_NAMES,
+        'n_rows': int(offset),
+        'last_date': str(dates.max()) if len(dates) else None,
+        'locations': locations,
+    }
+    return FeatureStore(features, cap_stats, dates, index)
+
+
+def build_feature_store(df, version):
+    """Compute the store for a loaded dataset with one vectorized pass per location."""
+    blocks = []
+    for (region, district), (dates, values) in daily_series(df).items():
+        features, cap_stats = series_features(values, dates, region, district)
+        blocks.append(((region, district), dates, features, cap_stats))
+    return _assemble(blocks, version)
+
+
+def update_feature_store(store, df, version):
+    """Refresh `store` for a newer dataset, computing only rows for newly added days.
+
+    A location's old rows are reused when its old dates and values are an exact
+    prefix of the new series (the usual case when days are appended); anything
+    else is recomputed for that location. Returns (store, rows_computed).
+    """
+    lag_1 = FEATURE_INDEX['lag_1']
+    blocks, computed = [], 0
+    for (region, district), (dates, values) in daily_series(df).items():
+        dates = np.asarray(dates).astype('datetime64[D]')
+        values = np.asarray(values, dtype=float)
+        old = store.rows(region, district)
+
+        reuse = 0
+        if old is not None:
+            old_dates, old_features, old_stats = old
+            n_old = len(old_dates)
+            # lag_1 holds the (cleaned) value of the row's own day
+            if (n_old <= len(dates) and np.array_equal(old_dates, dates[:n_old])
+                    and np.array_equal(old_features[:, lag_1], clean_series(values[:n_old]))):
+                reuse = n_old
+
+        if reuse:
+            context = values[max(reuse - MAX_LOOKBACK, 0):reuse]
+            new_features, new_stats = series_features(values[reuse:], dates[reuse:], region, district,
+                                                      context=context)
+            features = np.concatenate([np.asarray(old_features), new_features])
+            cap_stats = np.concatenate([np.asarray(old_stats), new_stats])
+        else:
+            features, cap_stats = series_features(values, dates, region, district)
+        computed += len(dates) - reuse
+        blocks.append(((region, district), dates, features, cap_stats))
+
+    return _assemble(blocks, version), computed
+
+
+def _version_dirs(root):
+    """Saved store directories under root, newest first."""
+    candidates = []
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if not name.startswith('.') and os.path.exists(os.path.join(path, 'index.json')):
+                candidates.append((os.path.getmtime(path), path))
+    return [path for _, path in sorted(candidates, reverse=True)]
+
+
+def _latest_version_dir(root, exclude):
+    for path in _version_dirs(root):
+        if os.path.basename(path) != exclude:
+            return path
+    return None
+
+
+def _prune(root, keep=KEEP_VERSIONS):
+    for path in _version_dirs(root)[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def open_or_build(load_df, root, version):
+    """Open the store for `version` under `root`, building (or updating) and saving it if needed.
+
+    `load_df` is called for the dataset only when the store has to be built.
+    Falls back to an in-memory store when `root` is not writable.
+    """
+    path = os.path.join(root, version)
+    if os.path.exists(os.path.join(path, 'index.json')):
+        try:
+            store = FeatureStore.open(path)
+            print(f"[OK] Feature store {version} opened: {len(store)} rows")
+            return store
+        except Exception as e:
+            print(f"[WARNING] Could not open feature store at {path}: {str(e)}")
+
+    df = load_df()
+    if df is None:
+        raise ValueError('Dataset not available to build the feature store')
+
+    previous = _latest_version_dir(root, exclude=version)
+    store = None
+    if previous is not None:
+        try:
+            store, computed = update_feature_store(FeatureStore.open(previous, mmap=False), df, version)
+            print(f"[OK] Feature store updated from {os.path.basename(previous)}: {computed} new rows")
+        except Exception as e:
+            print(f"[WARNING] Incremental feature store update failed, rebuilding: {str(e)}")
+    if store is None:
+        store = build_feature_store(df, version)
+        print(f"[OK] Feature store {version} built: {len(store)} rows")
+
+    try:
+        store.save(path)
+        _prune(root)
+        return FeatureStore.open(path)
+    except OSError as e:
+        print(f"[WARNING] Feature store not saved ({str(e)}), keeping it in memory")
+        return store
+
+
+if __name__ == '__main__':
+    from api.rf_predict import load_cholera_dataset, CSV_DATA_PATH, FEATURE_STORE_DIR
+    store = open_or_build(load_cholera_dataset, FEATURE_STORE_DIR, dataset_version(CSV_DATA_PATH))
+    print(f"Feature store at {os.path.join(FEATURE_STORE_DIR, store.version)}: "
+          f"{len(store)} rows, {len(store.locations())} locations, last date {store.index['last_date']}")
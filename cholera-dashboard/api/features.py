@@ -0,0 +1,139 @@
+"""
+Random Forest feature contract
+Single source of truth for the 28-feature vector the model was trained on.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Feature order expected by random_forest_model.pkl
+FEATURE_NAMES = [
+    'year', 'month', 'quarter', 'day_of_year',
+    'duration_days', 'deaths', 'CFR', 'confidence_weight', 'outbreak',
+    'lag_1', 'lag_daily_1', 'lag_2', 'lag_daily_2', 'lag_3', 'lag_daily_3',
+    'lag_6', 'lag_daily_6', 'lag_12', 'lag_daily_12',
+    'rolling_mean_3', 'rolling_std_3',
+    'rolling_mean_6', 'rolling_std_6',
+    'rolling_mean_12', 'rolling_std_12',
+    'cases_momentum',
+    'District_encoded', 'Region_encoded',
+]
+
+N_FEATURES = len(FEATURE_NAMES)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+LAGS = (1, 2, 3, 6, 12)
+ROLLING_WINDOWS = (3, 6, 12)
+
+# prepare_features looks at (at most) the last 30 days, zero-padded
+HISTORY_WINDOW = 30
+
+# predict_rf caps predictions against the last 7 days
+CAP_WINDOW = 7
+
+# Defaults used when the value is not available in a prediction context
+DEFAULT_DURATION_DAYS = 1.0
+DEFAULT_DEATHS = 0.0
+DEFAULT_CFR = 0.0
+DEFAULT_CONFIDENCE_WEIGHT = 1.0
+DEFAULT_OUTBREAK = 0.0
+
+# Longest look-back used by any lag / window feature
+MAX_LOOKBACK = max(max(LAGS), max(ROLLING_WINDOWS), CAP_WINDOW)
+
+
+def clean_series(values):
+    """Non-finite or negative case counts become 0.0, as in get_historical_sequence."""
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values) & (values >= 0), values, 0.0)
+
+
+def _window_features(windows, dates, region_encoded, district_encoded):
+    """Feature rows and capping stats from (n, MAX_LOOKBACK) trailing windows."""
+    n = len(windows)
+    dates = pd.DatetimeIndex(dates)
+    rows = np.zeros((n, N_FEATURES))
+    rows[:, FEATURE_INDEX['year']] = dates.year
+    rows[:, FEATURE_INDEX['month']] = dates.month
+    rows[:, FEATURE_INDEX['quarter']] = dates.quarter
+    rows[:, FEATURE_INDEX['day_of_year']] = dates.dayofyear
+    rows[:, FEATURE_INDEX['duration_days']] = DEFAULT_DURATION_DAYS
+    rows[:, FEATURE_INDEX['deaths']] = DEFAULT_DEATHS
+    rows[:, FEATURE_INDEX['CFR']] = DEFAULT_CFR
+    rows[:, FEATURE_INDEX['confidence_weight']] = DEFAULT_CONFIDENCE_WEIGHT
+    rows[:, FEATURE_INDEX['outbreak']] = DEFAULT_OUTBREAK
+
+    for k in LAGS:
+        rows[:, FEATURE_INDEX[f'lag_{k}']] = windows[:, -k]
+        rows[:, FEATURE_INDEX[f'lag_daily_{k}']] = windows[:, -k]
+
+    for w in ROLLING_WINDOWS:
+        recent = windows[:, -w:]
+        rows[:, FEATURE_INDEX[f'rolling_mean_{w}']] = recent.mean(axis=1)
+        rows[:, FEATURE_INDEX[f'rolling_std_{w}']] = recent.std(axis=1)
+
+    rows[:, FEATURE_INDEX['cases_momentum']] = np.maximum(windows[:, -1] - windows[:, -2], 0.0)
+    rows[:, FEATURE_INDEX['District_encoded']] = district_encoded
+    rows[:, FEATURE_INDEX['Region_encoded']] = region_encoded
+
+    recent = windows[:, -CAP_WINDOW:]
+    cap_stats = np.column_stack([recent.mean(axis=1), recent.max(axis=1), np.median(recent, axis=1)])
+    return rows, cap_stats
+
+
+def series_features(values, dates, region='Central', district='', context=None):
+    """Feature rows for every point of a daily series, in one vectorized pass.
+
+    Row i equals prepare_features({'date': dates[i], ...}, values[:i + 1]):
+    the history ends on (and includes) dates[i] and is zero-padded in front.
+    `context` optionally supplies the values preceding the series, so a tail
+    can be computed without recomputing the rows before it.
+    Also returns the (avg, max, median) capping statistics of each row's last
+    7 days as an (n, 3) array.
+    """
+    values = clean_series(values)
+    prefix = clean_series(context)[-MAX_LOOKBACK:] if context is not None else np.zeros(0)
+    padded = np.concatenate([np.zeros(MAX_LOOKBACK - len(prefix)), prefix, values])
+    # windows[i] holds the MAX_LOOKBACK values ending at values[i], oldest first
+    windows = sliding_window_view(padded, MAX_LOOKBACK)[1:]
+    return _window_features(windows, dates, 1.0 if region else 0.0, 1.0 if district else 0.0)
+
+
+def panel_features(series):
+    """series_features for many locations at once.
+
+    `series` is a list of (region, district, dates, values). All series are laid
+    out in one zero-separated array so lags and rolling windows never cross a
+    location boundary, and every row is computed in a single vectorized pass.
+    Returns (rows, cap_stats, group) where group[i] indexes the series of row i.
+    """
+    if not series:
+        return np.zeros((0, N_FEATURES)), np.zeros((0, 3)), np.zeros(0, dtype=int)
+
+    lengths = np.array([len(s[3]) for s in series])
+    group = np.repeat(np.arange(len(series)), lengths)
+    # Each series is preceded by MAX_LOOKBACK zeros of padding
+    first = np.cumsum(lengths + MAX_LOOKBACK) - lengths
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = first[group] + within
+
+    padded = np.zeros(int((lengths + MAX_LOOKBACK).sum()))
+    padded[positions] = clean_series(np.concatenate([np.asarray(s[3], dtype=float) for s in series]))
+    windows = sliding_window_view(padded, MAX_LOOKBACK)[positions - MAX_LOOKBACK + 1]
+
+    dates = np.concatenate([np.asarray(s[2], dtype='datetime64[ns]') for s in series])
+    region_encoded = np.array([1.0 if s[0] else 0.0 for s in series])[group]
+    district_encoded = np.array([1.0 if s[1] else 0.0 for s in series])[group]
+    rows, cap_stats = _window_features(windows, dates, region_encoded, district_encoded)
+    return rows, cap_stats, group
+
+
+def set_calendar(rows, date):
+    """Overwrite the calendar columns of feature rows in place with `date`,
+    either one date for all rows or one date per row."""
+    date = pd.Timestamp(date) if np.ndim(date) == 0 else pd.DatetimeIndex(date)
+    rows[:, FEATURE_INDEX['year']] = date.year
+    rows[:, FEATURE_INDEX['month']] = date.month
+    rows[:, FEATURE_INDEX['quarter']] = date.quarter
+    rows[:, FEATURE_INDEX['day_of_year']] = date.dayofyear
+    return rows
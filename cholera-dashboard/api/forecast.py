@@ -9,12 +9,17 @@ from datetime import datetime, timedelta
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.profiling import profiled_handler
+
+@profiled_handler
 def handler(request):
     """Handle forecast request"""
     try:
         import pandas as pd
         import numpy as np
-        from api.rf_predict import load_rf_model, load_cholera_dataset, get_historical_sequence, prepare_features, predict_rf
+        from api.rf_predict import dataset_last_date, get_historical_sequence, run_recursive_forecast, explain_features, select_model, forecast_limits, forecast_limiter
+        from api.admission import Overloaded
+        from api.explain import explain_requested
         
         # Parse request body
         if isinstance(request.get('body'), str):
@@ -34,14 +39,45 @@ def handler(request):
                 'body': json.dumps({'error': 'No data provided'})
             }
         
-        steps = body.get('steps', 14)
+        try:
+            steps, deadline = forecast_limits(body)
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': str(e)})
+            }
+        
+        try:
+            model, model_name = select_model(body.get('model'))
+        except KeyError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': e.args[0]})
+            }
+        if model is None:
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': f'Model {model_name} not available', 'model': model_name})
+            }
         
         # Get historical data
         historical_data = body.get('historicalSuspected', [])
         
         # Get last date from entire dataset
-        df = load_cholera_dataset()
-        if df is None or len(df) == 0:
+        last_dataset_date = dataset_last_date()
+        if last_dataset_date is None:
             return {
                 'statusCode': 503,
                 'headers': {
@@ -51,7 +87,6 @@ def handler(request):
                 'body': json.dumps({'error': 'Dataset not available'})
             }
         
-        last_dataset_date = df['reporting_date'].max()
         region = body.get('region', 'Central')
         district = body.get('district')
         
@@ -59,44 +94,24 @@ def handler(request):
             end_date = last_dataset_date.strftime('%Y-%m-%d')
             historical_data, _ = get_historical_sequence(region=region, district=district, end_date=end_date, sequence_length=60)
         
-        forecasts = []
-        current_history = historical_data.copy() if historical_data else [0.0] * 30
-        current_data = body.copy()
-        
         # Start from day after last dataset date
         start_date = pd.to_datetime(last_dataset_date) + timedelta(days=1)
-        current_data['date'] = start_date.strftime('%Y-%m-%d')
-        
-        for step in range(steps):
-            # Prepare features
-            features = prepare_features(current_data, current_history)
-            
-            # Predict
-            prediction = predict_rf(features, current_history)
-            
-            if prediction is None:
-                break
-            
-            # Ensure finite and non-negative
-            prediction = float(prediction)
-            if not np.isfinite(prediction) or prediction < 0:
-                prediction = 0.0
-            
-            # Add to history
-            current_history.append(prediction)
-            if len(current_history) > 60:
-                current_history = current_history[-60:]
-            
-            # Update date
-            current_date = datetime.strptime(current_data.get('date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d')
-            current_date += timedelta(days=1)
-            current_data['date'] = current_date.strftime('%Y-%m-%d')
-            
-            forecasts.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'predicted': prediction,
-                'step': step + 1
-            })
+        explain = explain_requested(body, request.get('query'))
+        feature_rows = [] if explain else None
+        try:
+            with forecast_limiter.slot(deadline):
+                forecasts = run_recursive_forecast(body, historical_data, start_date, steps, feature_rows=feature_rows,
+                                                   model=model, deadline=deadline)
+        except Overloaded as e:
+            return {
+                'statusCode': e.status,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Retry-After': str(e.retry_after)
+                },
+                'body': json.dumps({'error': str(e)})
+            }
         
         if not forecasts:
             return {
@@ -120,6 +135,24 @@ def handler(request):
                 'step': f.get('step')
             })
         
+        response_data = {
+            'forecast': cleaned_forecasts,
+            'model_type': 'Random Forest',
+            'model': model_name,
+            'timestamp': datetime.now().isoformat(),
+            'historical_data_points': len(historical_data),
+            'requested_steps': steps,
+            'partial': len(cleaned_forecasts) < steps
+        }
+        
+        # One batched attribution for every step of the forecast
+        if explain and feature_rows:
+            explanations, error = explain_features(np.vstack(feature_rows), model=model)
+            for f, e in zip(cleaned_forecasts, explanations or []):
+                f['explanation'] = e
+            if error:
+                response_data['explanation_error'] = error
+        
         return {
             'statusCode': 200,
             'headers': {
@@ -128,12 +161,7 @@ def handler(request):
                 'Access-Control-Allow-Methods': 'POST, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type'
             },
-            'body': json.dumps({
-                'forecast': cleaned_forecasts,
-                'model_type': 'Random Forest',
-                'timestamp': datetime.now().isoformat(),
-                'historical_data_points': len(historical_data)
-            })
+            'body': json.dumps(response_data)
         }
     except Exception as e:
         import traceback
@@ -0,0 +1,226 @@
+"""
+Rolling forecast state
+Fixed-size ring buffers that keep the lag features, rolling statistics and
+capping baseline of the recursive forecast up to date in O(1) per step.
+"""
+import math
+from bisect import bisect_left, insort
+
+import numpy as np
+
+from api.features import (
+    N_FEATURES, FEATURE_INDEX, LAGS, ROLLING_WINDOWS, HISTORY_WINDOW, CAP_WINDOW,
+    DEFAULT_DURATION_DAYS, DEFAULT_DEATHS, DEFAULT_CFR, DEFAULT_CONFIDENCE_WEIGHT,
+    DEFAULT_OUTBREAK,
+)
+
+# Largest lag / window referenced by the feature vector or the capping rule
+BUFFER_SIZE = max(max(LAGS), max(ROLLING_WINDOWS), CAP_WINDOW)
+
+# Recompute running sums from the buffer every N appends to stop float drift
+RESYNC_EVERY = 1024
+
+
+def _clean(value):
+    """Coerce a history value to a finite float (non-finite -> 0.0)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+class RollingForecastState:
+    """Recent case history for the recursive forecast loop.
+
+    Produces the same lag / rolling features as prepare_features and the same
+    capping statistics as predict_rf, without rebuilding them from a list on
+    every step. The feature row returned by features() is reused between calls.
+    """
+
+    def __init__(self, history=None):
+        history = list(history) if history else []
+        # Capping only kicks in once there are 7 real observations
+        self.count = len(history)
+
+        values = [_clean(x) for x in history[-HISTORY_WINDOW:]]
+        values = [0.0] * (BUFFER_SIZE - len(values)) + values[-BUFFER_SIZE:]
+        self._buf = values
+        self._head = 0  # next write position == oldest value
+        self._appends = 0
+
+        self._row = np.zeros((1, N_FEATURES))
+        self._row[0, FEATURE_INDEX['duration_days']] = DEFAULT_DURATION_DAYS
+        self._row[0, FEATURE_INDEX['deaths']] = DEFAULT_DEATHS
+        self._row[0, FEATURE_INDEX['CFR']] = DEFAULT_CFR
+        self._row[0, FEATURE_INDEX['confidence_weight']] = DEFAULT_CONFIDENCE_WEIGHT
+        self._row[0, FEATURE_INDEX['outbreak']] = DEFAULT_OUTBREAK
+
+        self._resync()
+
+    def _resync(self):
+        """Recompute window statistics exactly from the buffer."""
+        self._mean = {}
+        self._m2 = {}
+        for w in ROLLING_WINDOWS:
+            window = [self.lag(k) for k in range(1, w + 1)]
+            mean = sum(window) / w
+            self._mean[w] = mean
+            self._m2[w] = sum((x - mean) ** 2 for x in window)
+        cap = [self.lag(k) for k in range(1, CAP_WINDOW + 1)]
+        self._cap_sorted = sorted(cap)
+        self._cap_sum = sum(cap)
+
+    def lag(self, k):
+        """Value k days back (lag(1) is the most recent)."""
+        return self._buf[(self._head - k) % BUFFER_SIZE]
+
+    def append(self, value):
+        """Push a new daily value, sliding every window by one."""
+        value = _clean(value)
+
+        for w in ROLLING_WINDOWS:
+            old = self.lag(w)
+            mean = self._mean[w]
+            new_mean = mean + (value - old) / w
+            self._m2[w] += (value - old) * (value - new_mean + old - mean)
+            self._mean[w] = new_mean
+
+        old = self.lag(CAP_WINDOW)
+        del self._cap_sorted[bisect_left(self._cap_sorted, old)]
+        insort(self._cap_sorted, value)
+        self._cap_sum += value - old
+
+        self._buf[self._head] = value
+        self._head = (self._head + 1) % BUFFER_SIZE
+        self.count += 1
+
+        self._appends += 1
+        if self._appends % RESYNC_EVERY == 0:
+            self._resync()
+
+    def rolling_mean(self, window):
+        return self._mean[window]
+
+    def rolling_std(self, window):
+        # Population std, matching np.std
+        return math.sqrt(max(self._m2[window] / window, 0.0))
+
+    def recent_stats(self):
+        """(avg, max, median) of the last 7 days, or None with < 7 observations."""
+        if self.count < CAP_WINDOW:
+            return None
+        return (
+            self._cap_sum / CAP_WINDOW,
+            self._cap_sorted[-1],
+            self._cap_sorted[CAP_WINDOW // 2],
+        )
+
+    def features(self, date, region='Central', district=''):
+        """Fill and return the (1, 28) feature row for the given date."""
+        row = self._row[0]
+        month = date.month
+        row[FEATURE_INDEX['year']] = date.year
+        row[FEATURE_INDEX['month']] = month
+        row[FEATURE_INDEX['quarter']] = (month - 1) // 3 + 1
+        row[FEATURE_INDEX['day_of_year']] = date.timetuple().tm_yday
+
+        for k in LAGS:
+            value = self.lag(k)
+            row[FEATURE_INDEX[f'lag_{k}']] = value
+            row[FEATURE_INDEX[f'lag_daily_{k}']] = value
+
+        for w in ROLLING_WINDOWS:
+            row[FEATURE_INDEX[f'rolling_mean_{w}']] = self.rolling_mean(w)
+            row[FEATURE_INDEX[f'rolling_std_{w}']] = self.rolling_std(w)
+
+        last, prev = self.lag(1), self.lag(2)
+        row[FEATURE_INDEX['cases_momentum']] = last - prev if last >= prev else 0.0
+
+        row[FEATURE_INDEX['District_encoded']] = 1.0 if district else 0.0
+        row[FEATURE_INDEX['Region_encoded']] = 1.0 if region else 0.0
+        return self._row
+
+
+class BatchForecastState:
+    """Recent case history for several forecasts advanced in lockstep.
+
+    Vectorized counterpart of RollingForecastState: one ring buffer row per
+    scenario, so each step builds a single (n_scenarios, 28) feature matrix
+    and the model is called once for all of them.
+    """
+
+    def __init__(self, histories):
+        n = len(histories)
+        # Capping only kicks in once a scenario has 7 real observations
+        self.count = np.array([len(h) if h else 0 for h in histories])
+        self._buf = np.zeros((n, BUFFER_SIZE))
+        for i, history in enumerate(histories):
+            values = [_clean(x) for x in (history or [])[-BUFFER_SIZE:]]
+            if values:
+                self._buf[i, BUFFER_SIZE - len(values):] = values
+        self._head = 0  # next write position == oldest value
+
+        self._rows = np.zeros((n, N_FEATURES))
+        self._rows[:, FEATURE_INDEX['duration_days']] = DEFAULT_DURATION_DAYS
+        self._rows[:, FEATURE_INDEX['deaths']] = DEFAULT_DEATHS
+        self._rows[:, FEATURE_INDEX['CFR']] = DEFAULT_CFR
+        self._rows[:, FEATURE_INDEX['confidence_weight']] = DEFAULT_CONFIDENCE_WEIGHT
+        self._rows[:, FEATURE_INDEX['outbreak']] = DEFAULT_OUTBREAK
+
+    def __len__(self):
+        return self._buf.shape[0]
+
+    def lag(self, k):
+        """Column of values k days back for every scenario."""
+        return self._buf[:, (self._head - k) % BUFFER_SIZE]
+
+    def window(self, w):
+        """(n_scenarios, w) array of the last w days, oldest first."""
+        cols = [(self._head - k) % BUFFER_SIZE for k in range(w, 0, -1)]
+        return self._buf[:, cols]
+
+    def append(self, values):
+        """Push one new daily value per scenario."""
+        values = np.asarray(values, dtype=float)
+        self._buf[:, self._head] = np.where(np.isfinite(values), values, 0.0)
+        self._head = (self._head + 1) % BUFFER_SIZE
+        self.count += 1
+
+    def recent_stats(self):
+        """(avg, max, median, enabled) arrays over the last 7 days."""
+        recent = self.window(CAP_WINDOW)
+        return (
+            recent.mean(axis=1),
+            recent.max(axis=1),
+            np.median(recent, axis=1),
+            self.count >= CAP_WINDOW,
+        )
+
+    def features(self, dates, region='Central', district=''):
+        """Fill and return the (n_scenarios, 28) feature matrix.
+
+        `dates` is a pandas DatetimeIndex with one date per scenario.
+        """
+        rows = self._rows
+        rows[:, FEATURE_INDEX['year']] = dates.year
+        rows[:, FEATURE_INDEX['month']] = dates.month
+        rows[:, FEATURE_INDEX['quarter']] = dates.quarter
+        rows[:, FEATURE_INDEX['day_of_year']] = dates.dayofyear
+
+        for k in LAGS:
+            value = self.lag(k)
+            rows[:, FEATURE_INDEX[f'lag_{k}']] = value
+            rows[:, FEATURE_INDEX[f'lag_daily_{k}']] = value
+
+        for w in ROLLING_WINDOWS:
+            recent = self.window(w)
+            rows[:, FEATURE_INDEX[f'rolling_mean_{w}']] = recent.mean(axis=1)
+            rows[:, FEATURE_INDEX[f'rolling_std_{w}']] = recent.std(axis=1)
+
+        last, prev = self.lag(1), self.lag(2)
+        rows[:, FEATURE_INDEX['cases_momentum']] = np.where(last >= prev, last - prev, 0.0)
+
+        rows[:, FEATURE_INDEX['District_encoded']] = 1.0 if district else 0.0
+        rows[:, FEATURE_INDEX['Region_encoded']] = 1.0 if region else 0.0
+        return rows
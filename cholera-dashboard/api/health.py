@@ -8,23 +8,27 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.profiling import profiled_handler
+
+@profiled_handler
 def handler(request):
     """Health check handler - Vercel serverless function format"""
     try:
         # Try to import and load model/dataset
         try:
-            from api.rf_predict import load_rf_model, load_cholera_dataset
+            from api.rf_predict import load_rf_model, dataset_records, get_model_registry
             
             model = load_rf_model()
-            dataset = load_cholera_dataset()
+            records = dataset_records()
             
             model_status = "available" if model is not None else "unavailable"
-            dataset_status = "available" if dataset is not None and len(dataset) > 0 else "unavailable"
+            dataset_status = "available" if records else "unavailable"
             
             response_data = {
                 'status': 'ok',
                 'model': model_status,
                 'dataset': dataset_status,
+                'models': get_model_registry().available(),
                 'message': 'API is operational'
             }
         except Exception as e:
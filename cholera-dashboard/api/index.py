@@ -6,7 +6,12 @@ import json
 from api.health import handler as health_handler
 from api.predict import handler as predict_handler
 from api.forecast import handler as forecast_handler
+from api.scenarios import handler as scenarios_handler
+from api.alerts import handler as alerts_handler
+from api.series import handler as series_handler
+from api.profiling import profiled_handler
 
+@profiled_handler
 def handler(request):
     """Main request router for Vercel serverless functions"""
     path = request.get('path', '')
@@ -25,6 +30,21 @@ def handler(request):
             return forecast_handler(request)
         else:
             return {'statusCode': 405, 'body': json.dumps({'error': 'Method not allowed'})}
+    elif path == '/api/lstm/scenarios' or path == '/api/scenarios':
+        if method == 'POST':
+            return scenarios_handler(request)
+        else:
+            return {'statusCode': 405, 'body': json.dumps({'error': 'Method not allowed'})}
+    elif path == '/api/alerts':
+        if method == 'GET':
+            return alerts_handler(request)
+        else:
+            return {'statusCode': 405, 'body': json.dumps({'error': 'Method not allowed'})}
+    elif path == '/api/series':
+        if method == 'GET':
+            return series_handler(request)
+        else:
+            return {'statusCode': 405, 'body': json.dumps({'error': 'Method not allowed'})}
     else:
         return {
             'statusCode': 404,
@@ -0,0 +1,475 @@
+"""
+Local load-testing harness for the Vercel handlers
+Runs api/index.py:handler inside stand-in "instances" (one process each, one
+request at a time, like a serverless container) and drives a configurable
+mix of health / predict / forecast traffic against them.
+
+Instances start cold: the first request in a fresh process waits for the
+process to spawn and import the handler, then pays for model and dataset
+loading. Instance startup is reported on its own and cold requests are
+reported apart from warm ones. Idle instances are recycled after
+--idle-timeout seconds, so the next request on that slot is a cold start
+again. An instance that dies or does not answer within --timeout seconds is
+discarded rather than reused.
+
+Usage:
+    python loadtest.py --requests 200 --concurrency 8 --mix health=1,predict=3,forecast=2
+    python loadtest.py --duration 30 --max-instances 4 --idle-timeout 5 --json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REGIONS = ['Central', 'Eastern', 'Northern', 'Western']
+TRAFFIC_KINDS = ('health', 'predict', 'forecast', 'scenarios')
+
+# Status reported when the handler itself raises inside the instance
+HARNESS_ERROR_STATUS = 599
+# Statuses reported when the instance process dies or stops answering mid-request
+INSTANCE_DIED_STATUS = 502
+INSTANCE_TIMEOUT_STATUS = 504
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _instance_main(conn, api_root, quiet=True):
+    """Instance process: import the handler, report ready, then serve requests until told to stop."""
+    sys.path.insert(0, api_root)
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        from api.index import handler
+    except Exception as e:
+        conn.send(('error', repr(e)))
+        return
+    conn.send(('ready', _peak_rss_mb()))
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        start = time.perf_counter()
+        try:
+            response = handler(request)
+            status = response.get('statusCode', 200) if isinstance(response, dict) else 200
+        except Exception:
+            status = HARNESS_ERROR_STATUS
+        conn.send((status, time.perf_counter() - start, _peak_rss_mb()))
+
+
+class InstanceFailed(Exception):
+    """The instance process died, failed to start or stopped answering; carries the status to record."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class Instance:
+    """One stand-in serverless instance backed by a child process.
+
+    Construction blocks until the process has spawned and imported the
+    handler; that startup time is kept in `startup_seconds`.
+    """
+
+    def __init__(self, ctx, api_root, quiet=True, timeout=None):
+        self.timeout = timeout
+        self.requests = 0
+        self.peak_rss_mb = 0.0
+        started = time.perf_counter()
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_instance_main, args=(child_conn, api_root, quiet), daemon=True)
+        self.process.start()
+        # Drop our copy of the child's end so a dead child reads as EOF instead of hanging
+        child_conn.close()
+        try:
+            state, detail = self._receive()
+            if state != 'ready':
+                raise InstanceFailed(f'Instance failed to start: {detail}', HARNESS_ERROR_STATUS)
+        except InstanceFailed:
+            self.kill()
+            raise
+        self.peak_rss_mb = detail
+        self.startup_seconds = time.perf_counter() - started
+        self.last_used = time.monotonic()
+
+    def _receive(self):
+        if self.timeout is not None and not self.conn.poll(self.timeout):
+            raise InstanceFailed(f'Instance did not answer within {self.timeout}s', INSTANCE_TIMEOUT_STATUS)
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=1)
+            raise InstanceFailed(f'Instance exited (code {self.process.exitcode})', INSTANCE_DIED_STATUS)
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def invoke(self, request):
+        """(status, handler seconds). Raises InstanceFailed if the instance died or timed out."""
+        try:
+            self.conn.send(request)
+        except (BrokenPipeError, OSError):
+            raise InstanceFailed(f'Instance exited (code {self.process.exitcode})', INSTANCE_DIED_STATUS)
+        status, elapsed, rss = self._receive()
+        self.requests += 1
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return status, elapsed
+
+    def stop(self):
+        """Ask the process to exit without waiting for it."""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class InstancePool:
+    """Hands out idle instances, scaling up to max_instances and recycling idle ones.
+
+    Instances that died or timed out are discarded, never returned to the idle list.
+    """
+
+    def __init__(self, max_instances, idle_timeout, api_root=API_ROOT, quiet=True, timeout=None):
+        self.max_instances = max_instances
+        self.idle_timeout = idle_timeout
+        self.api_root = api_root
+        self.quiet = quiet
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle = []
+        self._busy = 0
+        self._cond = threading.Condition()
+        self._stopping = []  # retired instances, joined in close()
+        self.instances_started = 0
+        self.instances_recycled = 0
+        self.instances_failed = 0
+        self.startup_seconds = []
+        self.peak_rss_mb = 0.0
+
+    def _retire(self, instances):
+        """Tell instances to exit without waiting for them; called without holding the pool lock.
+
+        Joining a process takes 100+ ms, which would land in the latency of the
+        request that happened to retire it, so that is left to close().
+        """
+        for instance, died in instances:
+            if died:
+                instance.process.terminate()
+            else:
+                instance.stop()
+        with self._cond:
+            for instance, _ in instances:
+                self.peak_rss_mb = max(self.peak_rss_mb, instance.peak_rss_mb)
+            self._stopping += [instance for instance, _ in instances]
+
+    def _reap_idle(self):
+        """Take dead and expired instances off the idle list; returns them as (instance, died)."""
+        now = time.monotonic()
+        reaped = []
+        for instance in list(self._idle):
+            if not instance.alive():
+                self._idle.remove(instance)
+                self.instances_failed += 1
+                reaped.append((instance, True))
+            elif self.idle_timeout is not None and now - instance.last_used > self.idle_timeout:
+                self._idle.remove(instance)
+                self.instances_recycled += 1
+                reaped.append((instance, False))
+        return reaped
+
+    def acquire(self):
+        """An idle instance, or a freshly started one. Raises InstanceFailed if it cannot start."""
+        reaped = []
+        instance = None
+        with self._cond:
+            while True:
+                reaped += self._reap_idle()
+                if self._idle:
+                    # Most recently used first, like a warm container being reused
+                    instance = self._idle.pop()
+                    self._busy += 1
+                    break
+                if self._busy + len(self._idle) < self.max_instances:
+                    self._busy += 1
+                    self.instances_started += 1
+                    break
+                self._cond.wait()
+        self._retire(reaped)
+        if instance is not None:
+            return instance
+        try:
+            instance = Instance(self._ctx, self.api_root, self.quiet, self.timeout)
+        except InstanceFailed:
+            self._free_slot(failed=True)
+            raise
+        with self._cond:
+            self.startup_seconds.append(instance.startup_seconds)
+        return instance
+
+    def _free_slot(self, failed=False):
+        with self._cond:
+            self._busy -= 1
+            if failed:
+                self.instances_failed += 1
+            self._cond.notify()
+
+    def release(self, instance):
+        instance.last_used = time.monotonic()
+        with self._cond:
+            self._busy -= 1
+            self._idle.append(instance)
+            self._cond.notify()
+
+    def discard(self, instance):
+        """Drop an instance that died or timed out; its slot goes to a fresh instance."""
+        self._free_slot(failed=True)
+        self._retire([(instance, True)])
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        self._retire([(instance, False) for instance in idle])
+        with self._cond:
+            stopping, self._stopping = self._stopping, []
+        for instance in stopping:
+            instance.process.join(timeout=5)
+            if instance.process.is_alive():
+                instance.process.terminate()
+
+
+def build_request(kind, rng, steps=14):
+    """Vercel-style request dict for one traffic kind."""
+    region = rng.choice(REGIONS)
+    if kind == 'health':
+        return {'path': '/api/health', 'method': 'GET', 'headers': {}}
+    if kind == 'predict':
+        body = {'region': region}
+    elif kind == 'forecast':
+        body = {'region': region, 'steps': steps}
+    elif kind == 'scenarios':
+        body = {'region': region, 'steps': steps, 'grid': {'scale': [1.0, 1.25, 1.5]}}
+    else:
+        raise ValueError(f'Unknown traffic kind: {kind}')
+    return {
+        'path': f'/api/lstm/{kind}',
+        'method': 'POST',
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(body),
+    }
+
+
+def parse_mix(spec):
+    """'health=1,predict=3' -> {'health': 1.0, 'predict': 3.0}"""
+    mix = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in TRAFFIC_KINDS:
+            raise ValueError(f'Unknown traffic kind {kind!r}; expected one of {", ".join(TRAFFIC_KINDS)}')
+        mix[kind] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f'Invalid traffic mix: {spec!r}')
+    return mix
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _latency_summary(latencies):
+    return {
+        'count': len(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def run_load_test(mix, concurrency=4, requests=100, duration=None, max_instances=None,
+                  idle_timeout=None, think_time=0.0, steps=14, seed=0, quiet=True, timeout=60.0):
+    """Drive the handlers and return a report dict.
+
+    Stops after `requests` requests, or after `duration` seconds when given.
+    Request latency runs from asking the pool for an instance to the response,
+    so a cold request includes process spawn and handler import; instance
+    startup is also reported on its own. A request whose instance dies or
+    takes longer than `timeout` seconds is recorded as a 502 / 504 and the
+    instance is discarded.
+    """
+    max_instances = max_instances or concurrency
+    pool = InstancePool(max_instances, idle_timeout, quiet=quiet, timeout=timeout)
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+
+    lock = threading.Lock()
+    results = []
+    issued = [0]
+    deadline = time.monotonic() + duration if duration else None
+
+    def next_slot():
+        with lock:
+            if deadline is not None:
+                return time.monotonic() < deadline
+            if issued[0] >= requests:
+                return False
+            issued[0] += 1
+            return True
+
+    def user(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        while next_slot():
+            kind = rng.choices(kinds, weights)[0]
+            request = build_request(kind, rng, steps)
+            start = time.perf_counter()
+            try:
+                instance = pool.acquire()
+            except InstanceFailed as e:
+                status, cold = e.status, True
+            else:
+                cold = instance.requests == 0
+                try:
+                    status, _ = instance.invoke(request)
+                except InstanceFailed as e:
+                    status = e.status
+                    pool.discard(instance)
+                except BaseException:
+                    pool.discard(instance)
+                    raise
+                else:
+                    pool.release(instance)
+            latency = time.perf_counter() - start
+            with lock:
+                results.append((kind, status, latency, cold))
+            if think_time:
+                time.sleep(rng.expovariate(1.0 / think_time))
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(user, i) for i in range(concurrency)]:
+                future.result()
+    finally:
+        pool.close()
+    wall = time.perf_counter() - started
+
+    by_kind = defaultdict(list)
+    statuses = defaultdict(int)
+    errors = defaultdict(int)
+    cold_latencies, warm_latencies = [], []
+    for kind, status, latency, cold in results:
+        by_kind[kind].append(latency)
+        statuses[str(status)] += 1
+        if status >= 500:
+            errors[kind] += 1
+        (cold_latencies if cold else warm_latencies).append(latency)
+
+    endpoints = {}
+    for kind, latencies in sorted(by_kind.items()):
+        endpoints[kind] = dict(_latency_summary(latencies), errors=errors[kind])
+
+    return {
+        'requests': len(results),
+        'wall_seconds': wall,
+        'throughput_rps': len(results) / wall if wall > 0 else 0.0,
+        'concurrency': concurrency,
+        'max_instances': max_instances,
+        'instances_started': pool.instances_started,
+        'instances_recycled': pool.instances_recycled,
+        'instances_failed': pool.instances_failed,
+        'instance_startup': _latency_summary(pool.startup_seconds),
+        'cold_starts': len(cold_latencies),
+        'cold_start_latency': _latency_summary(cold_latencies),
+        'warm_latency': _latency_summary(warm_latencies),
+        'latency': _latency_summary([r[2] for r in results]),
+        'endpoints': endpoints,
+        'status_codes': dict(statuses),
+        'peak_rss_mb': pool.peak_rss_mb,
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Requests: {report['requests']} in {report['wall_seconds']:.2f}s "
+        f"({report['throughput_rps']:.1f} req/s), concurrency {report['concurrency']}",
+        f"Instances: {report['instances_started']} started, {report['instances_recycled']} recycled, "
+        f"{report['instances_failed']} failed (max {report['max_instances']})",
+        f"Instance startup (spawn + import): p50 {report['instance_startup']['p50_ms']:.0f} ms, "
+        f"max {report['instance_startup']['max_ms']:.0f} ms",
+        f"Cold requests: {report['cold_starts']} (p50 {report['cold_start_latency']['p50_ms']:.0f} ms, "
+        f"p95 {report['cold_start_latency']['p95_ms']:.0f} ms); warm requests: "
+        f"{report['warm_latency']['count']} (p50 {report['warm_latency']['p50_ms']:.0f} ms, "
+        f"p95 {report['warm_latency']['p95_ms']:.0f} ms)",
+        f"Peak RSS per instance: {report['peak_rss_mb']:.1f} MB",
+        f"Status codes: {report['status_codes']}",
+        '',
+        f"{'endpoint':<12}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    rows = list(report['endpoints'].items()) + [('all', dict(report['latency'], errors=sum(
+        e['errors'] for e in report['endpoints'].values())))]
+    for kind, stats in rows:
+        lines.append(f"{kind:<12}{stats['count']:>7}{stats['errors']:>8}"
+                     f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the Vercel handlers locally.')
+    parser.add_argument('--mix', default='health=1,predict=3,forecast=2',
+                        help='traffic weights, e.g. health=1,predict=3,forecast=2,scenarios=1')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent virtual users')
+    parser.add_argument('--requests', type=int, default=100, help='total requests (ignored with --duration)')
+    parser.add_argument('--duration', type=float, default=None, help='run for this many seconds')
+    parser.add_argument('--max-instances', type=int, default=None, help='instance cap (default: concurrency)')
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help='recycle instances idle this long (seconds); default: keep warm')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean pause between requests per user (seconds), lets idle instances expire')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='seconds before an instance that has not answered is discarded')
+    parser.add_argument('--steps', type=int, default=14, help='forecast horizon for forecast traffic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    parser.add_argument('--verbose', action='store_true', help='show handler output from the instances')
+    args = parser.parse_args(argv)
+
+    report = run_load_test(parse_mix(args.mix), concurrency=args.concurrency, requests=args.requests,
+                           duration=args.duration, max_instances=args.max_instances,
+                           idle_timeout=args.idle_timeout, think_time=args.think_time,
+                           steps=args.steps, seed=args.seed, quiet=not args.verbose,
+                           timeout=args.timeout)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Model registry
+Serves several forecasting models side by side, keyed by (name, version).
+Artifacts are registered up front but only loaded on first use, and loaded
+models are kept in an LRU cache bounded by an estimate of their memory use.
+
+Requests name a model as "name" (newest version of that name) or
+"name:version"; no name means the registry default.
+
+Extra models are discovered from <models dir>/<name>/<version>.pkl, each with
+an optional <version>.manifest.json written by train_rf.py.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+MODEL_EXTENSIONS = ('.pkl', '.joblib')
+
+
+def model_nbytes(model, path=None):
+    """Approximate memory held by a loaded model.
+
+    Tree ensembles are measured from their node and value arrays; anything
+    else falls back to the artifact size on disk.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None and hasattr(model, 'tree_'):
+        estimators = [model]
+    if estimators is not None:
+        try:
+            total = 0
+            for est in estimators:
+                state = est.tree_.__getstate__()
+                total += state['nodes'].nbytes + state['values'].nbytes
+            return total
+        except (AttributeError, KeyError, TypeError):
+            pass
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def parse_model_spec(spec):
+    """'name' or 'name:version' -> (name, version or None)."""
+    spec = str(spec).strip()
+    name, _, version = spec.partition(':')
+    if not name:
+        raise KeyError(f"Invalid model '{spec}'")
+    return name, version or None
+
+
+class ModelRegistry:
+    """Lazily loaded models with an LRU cache bounded by `max_bytes`.
+
+    `loader(path)` loads and validates one artifact, raising on failure.
+    """
+
+    def __init__(self, loader, max_bytes=512 * 1024 * 1024):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.default = None
+        self._entries = {}  # (name, version) -> artifact path
+        self._cache = OrderedDict()  # (name, version) -> (model, bytes)
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}  # (name, version) -> lock held while that artifact loads
+        self.loads = 0
+
+    @property
+    def cached_bytes(self):
+        return self._cached_bytes
+
+    def register(self, name, version, path, default=False):
+        key = (name, str(version))
+        with self._lock:
+            self._entries[key] = path
+            if default or self.default is None:
+                self.default = key
+        return key
+
+    def discover(self, root):
+        """Register every <root>/<name>/<version>.pkl; returns the keys found."""
+        found = []
+        if not os.path.isdir(root):
+            return found
+        for name in sorted(os.listdir(root)):
+            folder = os.path.join(root, name)
+            if name.startswith('.') or not os.path.isdir(folder):
+                continue
+            for filename in sorted(os.listdir(folder)):
+                version, ext = os.path.splitext(filename)
+                if ext in MODEL_EXTENSIONS and not version.startswith('.'):
+                    found.append(self.register(name, version, os.path.join(folder, filename)))
+        return found
+
+    def resolve(self, spec=None):
+        """(name, version) for a request's model spec. Raises KeyError for unknown models."""
+        if not spec:
+            if self.default is None:
+                raise KeyError('No models registered')
+            return self.default
+
+        name, version = parse_model_spec(spec)
+        if version is not None:
+            if (name, version) not in self._entries:
+                raise KeyError(f"Unknown model '{name}:{version}'")
+            return name, version
+
+        versions = [key for key in self._entries if key[0] == name]
+        if not versions:
+            raise KeyError(f"Unknown model '{name}'")
+
+        # Newest artifact of that name, even when the default shares the name
+        def mtime(key):
+            path = self._entries[key]
+            return os.path.getmtime(path) if os.path.exists(path) else 0
+        return max(versions, key=mtime)
+
+    def path(self, key):
+        return self._entries[key]
+
+    def get(self, spec=None):
+        """(model, (name, version)), loading the artifact on first use."""
+        key = self.resolve(spec)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key][0], key
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Concurrent first requests for one model wait for a single load
+        with load_lock:
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key][0], key
+
+            path = self._entries[key]
+            model = self.loader(path)
+            size = model_nbytes(model, path)
+
+        with self._lock:
+            self.loads += 1
+            self._cache[key] = (model, size)
+            self._cached_bytes += size
+            # Evict least recently used models, but always keep the one just loaded
+            while self._cached_bytes > self.max_bytes and len(self._cache) > 1:
+                evicted_key, (_, evicted) = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted
+                print(f"[INFO] Evicted model {evicted_key[0]}:{evicted_key[1]} ({evicted / 1e6:.1f} MB)")
+            return model, key
+
+    def available(self):
+        """JSON-ready list of registered models."""
+        with self._lock:
+            return [
+                {
+                    'name': name,
+                    'version': version,
+                    'default': (name, version) == self.default,
+                    'loaded': (name, version) in self._cache,
+                    'bytes': self._cache[(name, version)][1] if (name, version) in self._cache else None,
+                }
+                for name, version in sorted(self._entries)
+            ]
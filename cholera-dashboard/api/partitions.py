@@ -0,0 +1,206 @@
+"""
+Partitioned dataset storage
+Splits the preprocessed dataset into one shard per Region (optionally per
+Region and District) plus a small manifest, so the serving path only reads the
+shards a request touches. Loaded shards are kept in an LRU cache bounded by
+memory.
+
+Layout of <root>/<version>/:
+    manifest.json   version, source file stats, date range, row count and shard list
+    shard-000.pkl   preprocessed rows of one shard (pandas pickle)
+
+Build them at deploy time, whenever the dataset changes, with:
+    python partitions.py [--by-district]
+Requests only open existing partitions (see PARTITIONS_BUILD_ON_DEMAND in rf_predict.py).
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MANIFEST_FILE = 'manifest.json'
+
+# Shards kept on disk per root (the current version plus the previous one)
+KEEP_VERSIONS = 2
+
+
+def _clean_key(value):
+    return None if value is None or pd.isna(value) else value
+
+
+def source_stats(path):
+    """Cheap fingerprint of the source CSV (size and mtime), used to tell when it needs rehashing."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def write_partitions(df, root, version, source=None, by_district=False):
+    """Write `df` as shards under root/version and return the manifest."""
+    keys = ['Region', 'District'] if by_district and 'District' in df.columns else ['Region']
+    if 'Region' not in df.columns:
+        keys = []
+
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+    shards = []
+    try:
+        groups = df.groupby(keys, dropna=False, sort=True) if keys else [((), df)]
+        for i, (key, shard) in enumerate(groups):
+            key = key if isinstance(key, tuple) else (key,)
+            region = _clean_key(key[0]) if keys else None
+            district = _clean_key(key[1]) if len(keys) > 1 else None
+            filename = f'shard-{i:03d}.pkl'
+            shard.to_pickle(os.path.join(staging, filename))
+            shards.append({
+                'file': filename,
+                'region': region,
+                'district': district,
+                'rows': int(len(shard)),
+                'first_date': shard['reporting_date'].min().strftime('%Y-%m-%d'),
+                'last_date': shard['reporting_date'].max().strftime('%Y-%m-%d'),
+            })
+
+        manifest = {
+            'version': version,
+            'source': source,
+            'by_district': len(keys) > 1,
+            'n_rows': int(df.attrs.get('source_rows', len(df))),
+            'first_date': df['reporting_date'].min().strftime('%Y-%m-%d') if len(df) else None,
+            'last_date': df['reporting_date'].max().strftime('%Y-%m-%d') if len(df) else None,
+            'regions': sorted({s['region'] for s in shards if s['region'] is not None}),
+            'shards': shards,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        path = os.path.join(root, version)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(staging, path)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    for old in _version_dirs(root)[KEEP_VERSIONS:]:
+        shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def _version_dirs(root):
+    """Partition directories under root, newest first."""
+    found = []
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if not name.startswith('.') and os.path.exists(os.path.join(path, MANIFEST_FILE)):
+                found.append((os.path.getmtime(path), path))
+    return [path for _, path in sorted(found, reverse=True)]
+
+
+def find_partitions(root, version=None):
+    """Directory holding the partitions of dataset `version` (its content hash).
+
+    Matching on the hash rather than file stats survives checkouts and deploys,
+    which reset mtimes. Without a version (only partitions were deployed) the
+    newest one is used.
+    """
+    if version is None:
+        dirs = _version_dirs(root)
+        return dirs[0] if dirs else None
+    path = os.path.join(root, version)
+    manifest_file = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file) as f:
+        return path if json.load(f).get('version') == version else None
+
+
+class PartitionedDataset:
+    """Lazily loaded shards with an LRU cache bounded by `max_bytes`."""
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()  # file -> (frame, bytes)
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.manifest['last_date']) if self.manifest.get('last_date') else None
+
+    @property
+    def n_rows(self):
+        return self.manifest['n_rows']
+
+    @property
+    def cached_bytes(self):
+        return self._cached_bytes
+
+    def shards_for(self, region=None, district=None):
+        """Manifest entries of the shards that can contain rows for the filter."""
+        by_district = self.manifest.get('by_district')
+        selected = []
+        for shard in self.manifest['shards']:
+            if region and shard['region'] != region:
+                continue
+            if district and by_district and shard['district'] != district:
+                continue
+            selected.append(shard)
+        return selected
+
+    def _load(self, shard):
+        filename = shard['file']
+        with self._lock:
+            if filename in self._cache:
+                self._cache.move_to_end(filename)
+                return self._cache[filename][0]
+
+        frame = pd.read_pickle(os.path.join(self.path, filename))
+        size = int(frame.memory_usage(deep=True).sum())
+
+        with self._lock:
+            self.loads += 1
+            if filename not in self._cache:
+                self._cache[filename] = (frame, size)
+                self._cached_bytes += size
+            # Evict least recently used shards, but always keep the one just loaded
+            while self._cached_bytes > self.max_bytes and len(self._cache) > 1:
+                _, (_, evicted) = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted
+            return self._cache.get(filename, (frame, size))[0]
+
+    def frame(self, region=None, district=None):
+        """Rows for the region/district filter, reading only the shards it touches."""
+        shards = self.shards_for(region, district)
+        if not shards:
+            return None
+        frames = [self._load(shard) for shard in shards]
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+if __name__ == '__main__':
+    import argparse
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from api.dataset import read_cholera_csv
+    from api.feature_store import dataset_version
+    from api.rf_predict import CSV_DATA_PATH, PARTITIONS_DIR
+
+    parser = argparse.ArgumentParser(description='Write the per-Region dataset partitions.')
+    parser.add_argument('--data', default=CSV_DATA_PATH)
+    parser.add_argument('--out', default=PARTITIONS_DIR)
+    parser.add_argument('--by-district', action='store_true', help='one shard per (Region, District)')
+    args = parser.parse_args()
+
+    manifest = write_partitions(read_cholera_csv(args.data), args.out, dataset_version(args.data),
+                                source=source_stats(args.data), by_district=args.by_district)
+    print(f"[OK] {len(manifest['shards'])} shards, {manifest['n_rows']} rows, last date {manifest['last_date']} "
+          f"-> {os.path.join(args.out, manifest['version'])}")
@@ -8,10 +8,14 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.profiling import profiled_handler
+
+@profiled_handler
 def handler(request):
     """Handle prediction request"""
     try:
-        from api.rf_predict import load_rf_model, load_cholera_dataset, get_historical_sequence, prepare_features, predict_rf
+        from api.rf_predict import dataset_last_date, get_historical_sequence, historical_features, prediction_history_end, prepare_features, predict_rf, explain_features, select_model
+        from api.explain import explain_requested
         
         # Parse request body
         if isinstance(request.get('body'), str):
@@ -31,15 +35,37 @@ def handler(request):
                 'body': json.dumps({'error': 'No data provided'})
             }
         
+        try:
+            model, model_name = select_model(body.get('model'))
+        except KeyError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': e.args[0]})
+            }
+        if model is None:
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': f'Model {model_name} not available', 'model': model_name})
+            }
+        
         # Get historical data
         historical_data = body.get('historicalSuspected', [])
         region = body.get('region', 'Central')
         district = body.get('district')
+        features = None
         
         if not historical_data or len(historical_data) == 0:
             # Get from dataset
-            df = load_cholera_dataset()
-            if df is None or len(df) == 0:
+            last_dataset_date = dataset_last_date()
+            if last_dataset_date is None:
                 return {
                     'statusCode': 503,
                     'headers': {
@@ -49,14 +75,22 @@ def handler(request):
                     'body': json.dumps({'error': 'Dataset not available'})
                 }
             
-            end_date = df['reporting_date'].max().strftime('%Y-%m-%d')
-            historical_data, _ = get_historical_sequence(region=region, district=district, end_date=end_date, sequence_length=60)
+            # History ends the day before the predicted date, as in training
+            end_date = prediction_history_end(body)
+            # Historical dates are a feature store lookup
+            stored = historical_features(body, end_date)
+            if stored is not None:
+                features, stats = stored
+            else:
+                historical_data, _ = get_historical_sequence(region=region, district=district, end_date=end_date, sequence_length=60)
         
         # Prepare features
-        features = prepare_features(body, historical_data)
+        if features is None:
+            features = prepare_features(body, historical_data)
+            stats = None
         
         # Make prediction
-        prediction = predict_rf(features, historical_data)
+        prediction = predict_rf(features, historical_data, stats=stats, model=model)
         
         if prediction is None:
             return {
@@ -68,6 +102,19 @@ def handler(request):
                 'body': json.dumps({'error': 'Prediction failed'})
             }
         
+        response_data = {
+            'predicted': float(prediction),
+            'model_type': 'Random Forest',
+            'model': model_name,
+            'timestamp': __import__('datetime').datetime.now().isoformat()
+        }
+        
+        if explain_requested(body, request.get('query')):
+            explanations, error = explain_features(features, model=model)
+            response_data['explanation'] = explanations[0] if explanations else None
+            if error:
+                response_data['explanation_error'] = error
+        
         return {
             'statusCode': 200,
             'headers': {
@@ -76,11 +123,7 @@ def handler(request):
                 'Access-Control-Allow-Methods': 'POST, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type'
             },
-            'body': json.dumps({
-                'predicted': float(prediction),
-                'model_type': 'Random Forest',
-                'timestamp': __import__('datetime').datetime.now().isoformat()
-            })
+            'body': json.dumps(response_data)
         }
     except Exception as e:
         import traceback
@@ -0,0 +1,263 @@
+"""
+Per-request profiling hook
+Opt-in sampling profiler for the Flask app and the Vercel handlers. Profiles
+are written as collapsed stacks (`frame;frame;frame count`), which speedscope
+and flamegraph.pl both open directly.
+
+Enable with either:
+  CHOLERA_PROFILE=1                  profile requests (subject to the budget)
+  X-Profile-Token request header     signed with CHOLERA_PROFILE_SECRET
+
+Settings:
+  CHOLERA_PROFILE_DIR       output directory (default: <tmp>/cholera-profiles)
+  CHOLERA_PROFILE_RATE      fraction of requests profiled in env mode (default 1.0)
+  CHOLERA_PROFILE_BUDGET    max profiles per process per minute (default 6)
+  CHOLERA_PROFILE_INTERVAL  sampling interval in milliseconds (default 1)
+
+Generate a token with: python profiling.py token /api/lstm/forecast
+"""
+import functools
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_HEADER = 'X-Profile-Token'
+RESULT_HEADER = 'X-Profile-File'
+TOKEN_TTL_SECONDS = 300
+BUDGET_WINDOW_SECONDS = 60
+# Stop sampling a single request after this many samples
+MAX_SAMPLES = 50000
+
+_local = threading.local()
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def profile_dir():
+    return os.environ.get('CHOLERA_PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'cholera-profiles')
+
+
+class ProfileBudget:
+    """At most `max_profiles` profiles per sliding window, shared by all threads."""
+
+    def __init__(self, max_profiles, window_seconds=BUDGET_WINDOW_SECONDS):
+        self.max_profiles = max_profiles
+        self.window_seconds = window_seconds
+        self._started = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._started and now - self._started[0] > self.window_seconds:
+                self._started.popleft()
+            if len(self._started) >= self.max_profiles:
+                return False
+            self._started.append(now)
+            return True
+
+
+def _get_budget():
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = ProfileBudget(int(_env_float('CHOLERA_PROFILE_BUDGET', 6)))
+        return _budget
+
+
+def make_profile_token(path, secret=None, ttl=TOKEN_TTL_SECONDS):
+    """Signed `<expires>.<hmac>` token enabling profiling of `path`."""
+    secret = secret or os.environ.get('CHOLERA_PROFILE_SECRET', '')
+    if not secret:
+        raise ValueError('CHOLERA_PROFILE_SECRET is not set')
+    expires = int(time.time()) + ttl
+    digest = hmac.new(secret.encode(), f'{expires}:{path}'.encode(), hashlib.sha256).hexdigest()
+    return f'{expires}.{digest}'
+
+
+def _valid_token(token, path):
+    secret = os.environ.get('CHOLERA_PROFILE_SECRET', '')
+    if not secret or not token or '.' not in token:
+        return False
+    expires, digest = token.split('.', 1)
+    try:
+        if int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    expected = hmac.new(secret.encode(), f'{expires}:{path}'.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+def _header(headers, name):
+    """Case-insensitive header lookup for Flask headers or a plain dict."""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is not None:
+        return value
+    lowered = name.lower()
+    for key, value in dict(headers).items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+def should_profile(path, headers=None):
+    """Whether this request should be profiled (consumes budget when it is)."""
+    if getattr(_local, 'profiler', None) is not None:
+        return False  # already inside a profiled request
+    if _valid_token(_header(headers, PROFILE_HEADER), path):
+        return _get_budget().acquire()
+    if os.environ.get('CHOLERA_PROFILE', '').lower() in ('1', 'true', 'yes'):
+        if random.random() < _env_float('CHOLERA_PROFILE_RATE', 1.0):
+            return _get_budget().acquire()
+    return False
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class RequestProfiler:
+    """Samples the calling thread's stack on a background thread."""
+
+    def __init__(self, name, interval=None):
+        self.name = name
+        self.interval = interval if interval is not None else _env_float('CHOLERA_PROFILE_INTERVAL', 1) / 1000.0
+        self.samples = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='cholera-profiler', daemon=True)
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        _local.profiler = self
+        self._sampler.start()
+        return self
+
+    def _run(self):
+        n = 0
+        while not self._stop.wait(self.interval) and n < MAX_SAMPLES:
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+            n += 1
+
+    def stop(self):
+        """Stop sampling and write the collapsed-stack file; returns its path, or None if
+        it could not be written (profiling never fails the request it observes)."""
+        self._stop.set()
+        self._sampler.join()
+        _local.profiler = None
+        elapsed = time.perf_counter() - self._started_at
+
+        out_dir = profile_dir()
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.name).strip('_') or 'request'
+        filename = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}-{safe_name}.collapsed"
+        path = os.path.join(out_dir, filename)
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            with open(path, 'w') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f'{stack} {count}\n')
+        except OSError as e:
+            print(f"[WARNING] Could not write profile for {self.name} to {out_dir}: {str(e)}")
+            return None
+        print(f"[INFO] Profiled {self.name} in {elapsed * 1000:.1f} ms "
+              f"({sum(self.samples.values())} samples) -> {path}")
+        return path
+
+
+@contextmanager
+def profile_request(path, headers=None):
+    """Profile the enclosed block if the request opted in; yields the profiler or None.
+
+    The decision is made once per request by the outermost block: a decorated
+    handler called from another one (index.handler routing to predict.handler)
+    yields None instead of rolling CHOLERA_PROFILE_RATE again.
+    """
+    if getattr(_local, 'in_request', False):
+        yield None
+        return
+    _local.in_request = True
+    try:
+        if not should_profile(path, headers):
+            yield None
+            return
+        profiler = RequestProfiler(path).start()
+        try:
+            yield profiler
+        finally:
+            profiler.result_path = profiler.stop()
+    finally:
+        _local.in_request = False
+
+
+def profiled_handler(func):
+    """Decorator for Vercel handlers taking a plain request dict."""
+    @functools.wraps(func)
+    def wrapper(request):
+        path = request.get('path') or func.__module__
+        with profile_request(path, request.get('headers')) as profiler:
+            response = func(request)
+        if profiler is not None and profiler.result_path and isinstance(response, dict):
+            response.setdefault('headers', {})[RESULT_HEADER] = os.path.basename(profiler.result_path)
+        return response
+    return wrapper
+
+
+def init_flask_profiling(app):
+    """Register before/after request hooks that profile opted-in requests."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_profiler():
+        if should_profile(request.path, request.headers):
+            g.request_profiler = RequestProfiler(request.path).start()
+
+    @app.after_request
+    def _stop_profiler(response):
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            path = profiler.stop()
+            if path:
+                response.headers[RESULT_HEADER] = os.path.basename(path)
+        return response
+
+    @app.teardown_request
+    def _discard_profiler(exc):
+        # after_request is skipped on unhandled errors
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            profiler.stop()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == 'token':
+        print(f'{PROFILE_HEADER}: {make_profile_token(sys.argv[2])}')
+    else:
+        print('Usage: python profiling.py token <path>')
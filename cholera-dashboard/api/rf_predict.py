@@ -5,14 +5,35 @@ Supports both Flask (for local development) and Vercel serverless functions.
 """
 
 import os
+import sys
 import json
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+import itertools
+from collections import OrderedDict
+import tempfile
+import threading
 import warnings
 import joblib
 warnings.filterwarnings('ignore')
 
+# Make the api package importable when run directly as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.downsample import lttb_indices
+from api.dataset import read_cholera_csv, read_cholera_csv_chunked, DEFAULT_CHUNK_ROWS
+from api.explain import explain_requested, explain_rows
+from api.admission import ConcurrencyLimiter, Deadline, Overloaded
+from api.model_registry import ModelRegistry
+from api.features import FEATURE_NAMES, HISTORY_WINDOW
+from api.forecast_state import RollingForecastState, BatchForecastState
+from api.profiling import init_flask_profiling
+from api.feature_store import FeatureStore, dataset_version, open_or_build
+from api.partitions import PartitionedDataset, find_partitions, source_stats, write_partitions
+from api.scanner import (scan, DEFAULT_WEEKS, DEFAULT_MIN_CASES, DEFAULT_Z_THRESHOLD,
+                         DEFAULT_GROWTH_THRESHOLD)
+from api.train_rf import load_manifest
+
 # Flask imports only for local development (not needed for Vercel)
 try:
     from flask import Flask, request, jsonify
@@ -24,6 +45,16 @@ except ImportError:
     FLASK_AVAILABLE = False
     app = None
 
+# Opt-in per-request profiling (see profiling.py)
+if app is not None:
+    init_flask_profiling(app)
+
+def route(rule, **options):
+    """app.route when Flask is available, otherwise a no-op so Vercel can import this module."""
+    if app is None:
+        return lambda func: func
+    return app.route(rule, **options)
+
 # Base directory - go up two levels from api/ to get to Cholera root
 # For Vercel, files might be in different locations, try multiple paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -62,14 +93,101 @@ if RF_MODEL_PATH is None:
 if CSV_DATA_PATH is None:
     CSV_DATA_PATH = os.path.join(BASE_DIR, 'cholera_data3.csv')
 
-# Global model variable
-rf_model = None
-model_loaded = False
+# Precomputed historical features, one sub-directory per dataset version
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR') or os.path.join(tempfile.gettempdir(), 'cholera-feature-store')
+
+# The store is built offline (python feature_store.py) or at startup of the local
+# Flask server; requests only open it unless FEATURE_STORE_BUILD_ON_DEMAND is set
+FEATURE_STORE_BUILD_ON_DEMAND = os.environ.get('FEATURE_STORE_BUILD_ON_DEMAND', '').lower() in ('1', 'true', 'yes')
+
+# Per-Region dataset shards, loaded lazily and cached up to PARTITION_CACHE_MB. They are
+# written at deploy time (python partitions.py) or at startup of the local Flask server;
+# requests only open them unless PARTITIONS_BUILD_ON_DEMAND is set
+PARTITIONS_DIR = os.environ.get('PARTITIONS_DIR') or os.path.join(BASE_DIR, 'partitions')
+PARTITIONS_BUILD_ON_DEMAND = os.environ.get('PARTITIONS_BUILD_ON_DEMAND', '').lower() in ('1', 'true', 'yes')
+PARTITION_CACHE_MB = float(os.environ.get('PARTITION_CACHE_MB', 64))
+PARTITION_BY_DISTRICT = os.environ.get('PARTITION_BY_DISTRICT', '').lower() in ('1', 'true', 'yes')
+
+# Extra models served side by side: <MODELS_DIR>/<name>/<version>.pkl
+MODELS_DIR = os.environ.get('MODELS_DIR') or os.path.join(BASE_DIR, 'models')
+MODEL_CACHE_MB = float(os.environ.get('MODEL_CACHE_MB', 512))
+DEFAULT_MODEL_NAME = 'random_forest'
+DEFAULT_MODEL_VERSION = 'default'
+
+# Datasets larger than STREAM_DATASET_MB (or any, when DATASET_CHUNK_ROWS is set) are
+# streamed in chunks into daily sums per (Region, District) instead of loaded whole
+STREAM_DATASET_MB = float(os.environ.get('STREAM_DATASET_MB', 256))
+DATASET_CHUNK_ROWS = int(os.environ.get('DATASET_CHUNK_ROWS', 0))
+
+# Columns of an empty location frame (location with no shards)
+DATASET_COLUMNS = ['reporting_date', 'sCh', 'cCh', 'deaths', 'CFR', 'District', 'Region']
+
+# Global model registry and dataset
+model_registry = None
 dataset_loaded = False
 cholera_dataset = None
+feature_store = None
+feature_store_missing = None
+partitioned_dataset = None
+partitions_missing = None
+
+# Ranked alert lists per (dataset version, as-of date, scan parameters)
+alerts_cache = {}
+alerts_cache_lock = threading.Lock()
+dataset_version_cache = None
+ALERTS_CACHE_SIZE = 32
+MAX_ALERT_WEEKS = 52
+
+# Downsampled chart series per (dataset version, location, metric, range, point budget)
+series_cache = OrderedDict()
+series_cache_lock = threading.Lock()
+SERIES_CACHE_SIZE = 256
+SERIES_METRICS = ('sCh', 'cCh', 'deaths')
+DEFAULT_SERIES_POINTS = 500
+MAX_SERIES_POINTS = 5000
+
+# Upper bound on scenarios per /api/lstm/scenarios request
+MAX_SCENARIOS = 64
+DEFAULT_SCENARIO_SCALES = [1.0, 1.25, 1.5]
+
+# Forecast horizon, time budget and admission control (see admission.py)
+DEFAULT_FORECAST_STEPS = 14
+MAX_FORECAST_STEPS = int(os.environ.get('MAX_FORECAST_STEPS', 365))
+FORECAST_DEADLINE_SECONDS = float(os.environ.get('FORECAST_DEADLINE_SECONDS', 10))
+MAX_FORECAST_DEADLINE_SECONDS = float(os.environ.get('MAX_FORECAST_DEADLINE_SECONDS', 30))
+forecast_limiter = ConcurrencyLimiter(
+    max_active=int(os.environ.get('FORECAST_CONCURRENCY', 4)),
+    max_queue=int(os.environ.get('FORECAST_QUEUE', 8)),
+    queue_timeout=float(os.environ.get('FORECAST_QUEUE_TIMEOUT_SECONDS', 2)),
+)
+
+def csv_dataset_version():
+    """Content hash of the dataset CSV, recomputed only when its size or mtime changes."""
+    global dataset_version_cache
+    
+    if not os.path.exists(CSV_DATA_PATH):
+        return None
+    
+    stats = source_stats(CSV_DATA_PATH)
+    if dataset_version_cache is None or dataset_version_cache[0] != stats:
+        dataset_version_cache = (stats, dataset_version(CSV_DATA_PATH))
+    return dataset_version_cache[1]
+
+def read_dataset():
+    """Read the dataset CSV without caching it (streamed when large, see STREAM_DATASET_MB)."""
+    size_mb = os.path.getsize(CSV_DATA_PATH) / (1024 * 1024)
+    if DATASET_CHUNK_ROWS > 0 or size_mb > STREAM_DATASET_MB:
+        chunk_rows = DATASET_CHUNK_ROWS or DEFAULT_CHUNK_ROWS
+        print(f"Streaming dataset from: {CSV_DATA_PATH} ({size_mb:.0f} MB, {chunk_rows} rows per chunk)")
+        df = read_cholera_csv_chunked(CSV_DATA_PATH, chunk_rows=chunk_rows)
+    else:
+        print(f"Loading dataset from: {CSV_DATA_PATH}")
+        df = read_cholera_csv(CSV_DATA_PATH)
+    print(f"[OK] Dataset read: {df.attrs.get('source_rows', len(df))} records from {df['reporting_date'].min()} to {df['reporting_date'].max()}")
+    return df
 
 def load_cholera_dataset():
-    """Load the cholera dataset from CSV file."""
+    """Load the cholera dataset from CSV file and keep it in memory."""
     global cholera_dataset, dataset_loaded
     
     if dataset_loaded and cholera_dataset is not None:
@@ -80,40 +198,9 @@ def load_cholera_dataset():
         return None
     
     try:
-        print(f"Loading dataset from: {CSV_DATA_PATH}")
-        df = pd.read_csv(CSV_DATA_PATH)
-        
-        # Parse dates (handle DD/MM/YYYY format)
-        def parse_date(date_str):
-            if pd.isna(date_str):
-                return None
-            date_str = str(date_str).strip()
-            if '/' in date_str:
-                parts = date_str.split('/')
-                if len(parts) == 3:
-                    try:
-                        day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
-                        return pd.Timestamp(year, month, day)
-                    except:
-                        pass
-            try:
-                return pd.to_datetime(date_str)
-            except:
-                return None
-        
-        df['reporting_date'] = df['reporting_date'].apply(parse_date)
-        df = df.dropna(subset=['reporting_date'])
-        df = df.sort_values('reporting_date')
-        
-        # Ensure numeric columns
-        numeric_cols = ['sCh', 'cCh', 'deaths', 'CFR']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
+        df = read_dataset()
         cholera_dataset = df
         dataset_loaded = True
-        print(f"[OK] Dataset loaded: {len(df)} records from {df['reporting_date'].min()} to {df['reporting_date'].max()}")
         return cholera_dataset
     except Exception as e:
         print(f"[ERROR] Error loading dataset: {str(e)}")
@@ -121,10 +208,123 @@ def load_cholera_dataset():
         traceback.print_exc()
         return None
 
-def get_historical_sequence(region=None, district=None, end_date=None, sequence_length=30):
-    """Extract historical sequence from the dataset."""
+def load_partitions(build=None):
+    """Open the prebuilt per-Region partitions of the current dataset, or None.
+    With `build` (default PARTITIONS_BUILD_ON_DEMAND) missing partitions are written."""
+    global partitioned_dataset, partitions_missing
+    
+    if partitioned_dataset is not None:
+        return partitioned_dataset
+    
+    try:
+        version = csv_dataset_version()
+        path = find_partitions(PARTITIONS_DIR, version)
+        if path is None:
+            build = PARTITIONS_BUILD_ON_DEMAND if build is None else build
+            if version is None:
+                return None
+            if not build:
+                if partitions_missing != version:
+                    partitions_missing = version
+                    print(f"[WARNING] No partitions for dataset {version} under {PARTITIONS_DIR}; "
+                          f"build them with python partitions.py. Using the full dataset meanwhile.")
+                return None
+            # Written from a read that is not cached, so the process only keeps the shards it touches
+            df = read_dataset()
+            if len(df) == 0:
+                return None
+            manifest = write_partitions(df, PARTITIONS_DIR, version,
+                                        source=source_stats(CSV_DATA_PATH), by_district=PARTITION_BY_DISTRICT)
+            del df
+            path = os.path.join(PARTITIONS_DIR, manifest['version'])
+            print(f"[OK] Dataset partitioned into {len(manifest['shards'])} shards at {path}")
+        partitioned_dataset = PartitionedDataset(path, max_bytes=int(PARTITION_CACHE_MB * 1024 * 1024))
+        return partitioned_dataset
+    except Exception as e:
+        print(f"[WARNING] Dataset partitions unavailable, using the full dataset: {str(e)}")
+        return None
+
+def load_location_frame(region=None, district=None):
+    """Dataset rows that can match the region/district filter (None if no dataset).
+    Reads only the shards the filter touches when partitions are available."""
+    parts = load_partitions()
+    if parts is None:
+        return load_cholera_dataset()
+    
+    frame = parts.frame(region, district)
+    if frame is None:
+        return pd.DataFrame(columns=DATASET_COLUMNS)
+    return frame
+
+def dataset_last_date():
+    """Last reporting date in the ENTIRE dataset (all regions), or None."""
+    parts = load_partitions()
+    if parts is not None:
+        return parts.last_date
     df = load_cholera_dataset()
     if df is None or len(df) == 0:
+        return None
+    return df['reporting_date'].max()
+
+def dataset_records():
+    """Number of records in the dataset, or None if it is unavailable."""
+    parts = load_partitions()
+    if parts is not None:
+        return parts.n_rows
+    df = load_cholera_dataset()
+    return df.attrs.get('source_rows', len(df)) if df is not None else None
+
+def load_feature_store(build=None):
+    """Open the prebuilt historical feature store for the current dataset, or None.
+    With `build` (default FEATURE_STORE_BUILD_ON_DEMAND) a missing store is built."""
+    global feature_store, feature_store_missing
+    
+    if feature_store is not None:
+        return feature_store
+    
+    version = csv_dataset_version()
+    if version is None:
+        return None
+    build = FEATURE_STORE_BUILD_ON_DEMAND if build is None else build
+    path = os.path.join(FEATURE_STORE_DIR, version)
+    
+    try:
+        if build:
+            # The dataset is only read (and not kept) when the store has to be (re)built
+            feature_store = open_or_build(read_dataset, FEATURE_STORE_DIR, version)
+        elif os.path.exists(os.path.join(path, 'index.json')):
+            feature_store = FeatureStore.open(path)
+            print(f"[OK] Feature store {version} opened: {len(feature_store)} rows")
+        elif feature_store_missing != version:
+            feature_store_missing = version
+            print(f"[WARNING] No feature store for dataset {version} under {FEATURE_STORE_DIR}; "
+                  f"build it with python feature_store.py. Using the slow path meanwhile.")
+        return feature_store
+    except Exception as e:
+        print(f"[ERROR] Error loading feature store: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def historical_features(data, history_end):
+    """Feature row and capping stats from the feature store, or None to fall back
+    to get_historical_sequence + prepare_features."""
+    store = load_feature_store()
+    if store is None:
+        return None
+    feature_date = data.get('date') or datetime.now().strftime('%Y-%m-%d')
+    return store.lookup(data.get('region', 'Central'), data.get('district'), history_end, feature_date)
+
+def prediction_history_end(data):
+    """Last day of history for a prediction on data['date'] (default today): the day
+    before it, as in the training rows, so lag_1 is never the predicted day's own value."""
+    feature_date = pd.to_datetime(data.get('date') or datetime.now().strftime('%Y-%m-%d'))
+    return (feature_date - timedelta(days=1)).strftime('%Y-%m-%d')
+
+def get_historical_sequence(region=None, district=None, end_date=None, sequence_length=30):
+    """Extract historical sequence from the dataset."""
+    df = load_location_frame(region, district)
+    if df is None:
         return [], None
     
     # Filter by region/district if provided
@@ -166,34 +366,66 @@ def get_historical_sequence(region=None, district=None, end_date=None, sequence_
     
     return sequence[-sequence_length:], last_date
 
-def load_rf_model():
-    """Load the Random Forest model."""
-    global rf_model, model_loaded
+def load_model_artifact(path):
+    """Load one model file, refusing it when its manifest lists a different feature order."""
+    print(f"Loading model from: {path}")
+    model = joblib.load(path)
     
-    if model_loaded and rf_model is not None:
-        return rf_model
+    # Models built by train_rf.py carry a manifest of the feature order they were trained on
+    manifest = load_manifest(path)
+    if manifest is not None:
+        if manifest.get('feature_names') != FEATURE_NAMES:
+            raise ValueError(f"Model manifest feature order does not match the serving features; refusing to load {path}")
+        serving_version = csv_dataset_version()
+        if serving_version is not None and manifest.get('data_hash') != serving_version:
+            print(f"[INFO] Model was trained on dataset {manifest.get('data_hash')}, serving a different version")
     
-    if not os.path.exists(RF_MODEL_PATH):
-        print(f"[WARNING] Random Forest model not found at: {RF_MODEL_PATH}")
-        return None
+    print(f"[OK] Model loaded successfully: {type(model).__name__}")
+    if hasattr(model, 'n_features_in_'):
+        print(f"[INFO] Model expects {model.n_features_in_} features")
+    return model
+
+def get_model_registry():
+    """The process-wide model registry: the bundled Random Forest plus anything under MODELS_DIR."""
+    global model_registry
+    
+    if model_registry is None:
+        registry = ModelRegistry(load_model_artifact, max_bytes=int(MODEL_CACHE_MB * 1024 * 1024))
+        registry.register(DEFAULT_MODEL_NAME, DEFAULT_MODEL_VERSION, RF_MODEL_PATH, default=True)
+        found = registry.discover(MODELS_DIR)
+        if found:
+            print(f"[INFO] Registered {len(found)} model(s) from {MODELS_DIR}")
+        model_registry = registry
+    return model_registry
+
+def select_model(spec=None):
+    """(model, 'name:version') for a request's `model` parameter; model is None if it failed to load.
+    Raises KeyError for models that are not registered."""
+    registry = get_model_registry()
+    key = registry.resolve(spec)
+    label = f"{key[0]}:{key[1]}"
+    
+    if not os.path.exists(registry.path(key)):
+        print(f"[WARNING] Model {label} not found at: {registry.path(key)}")
+        return None, label
     
     try:
-        print(f"Loading Random Forest model from: {RF_MODEL_PATH}")
-        rf_model = joblib.load(RF_MODEL_PATH)
-        model_loaded = True
-        print("[OK] Random Forest model loaded successfully")
-        
-        # Print model info for debugging
-        if hasattr(rf_model, 'n_features_in_'):
-            print(f"[INFO] Model expects {rf_model.n_features_in_} features")
-        print(f"[INFO] Model type: {type(rf_model)}")
-        
-        return rf_model
+        model, _ = registry.get(f"{key[0]}:{key[1]}")
+        return model, label
     except Exception as e:
-        print(f"[ERROR] Error loading Random Forest model: {str(e)}")
+        print(f"[ERROR] Error loading model {label}: {str(e)}")
         import traceback
         traceback.print_exc()
+        return None, label
+
+def load_rf_model(spec=None):
+    """Load a model from the registry (the default Random Forest unless `spec` names another)."""
+    try:
+        model, _ = select_model(spec)
+    except KeyError as e:
+        print(f"[ERROR] {e.args[0]}")
         return None
+    return model
 
 def prepare_features(data, historical_data=None):
     """Prepare features for Random Forest model prediction.
@@ -287,27 +519,64 @@ def prepare_features(data, historical_data=None):
     
     return np.array(features).reshape(1, -1)
 
-def predict_rf(features, historical_data=None):
-    """Make prediction using Random Forest model."""
-    global rf_model
+def recent_stats(historical_data):
+    """(avg, max, median) of the last 7 days used to cap predictions, or None."""
+    if not historical_data or len(historical_data) < 7:
+        return None
+    recent = historical_data[-7:]
+    return np.mean(recent), np.max(recent), np.median(recent)
+
+def cap_prediction(prediction, stats):
+    """Cap an unrealistic prediction against the recent (avg, max, median)."""
+    if stats is None:
+        return prediction
+    recent_avg, recent_max, recent_median = stats
+    
+    # Use the median or max as baseline (more stable than average)
+    baseline = max(recent_median, recent_max * 0.8) if recent_max > 0 else recent_avg
+    
+    # If prediction is more than 2x the baseline, cap it very aggressively
+    if baseline > 0:
+        if prediction > baseline * 2:
+            # Cap to baseline + 20% (very conservative)
+            original_pred = prediction
+            prediction = baseline * 1.2
+            print(f"[INFO] Capped unrealistic prediction. Original: {original_pred:.2f}, Capped to: {prediction:.2f} (baseline: {baseline:.2f}, recent avg: {recent_avg:.2f}, recent max: {recent_max:.2f})")
+        elif prediction > baseline * 1.5:
+            # If between 1.5x-2x baseline, cap to baseline + 10%
+            original_pred = prediction
+            prediction = baseline * 1.1
+            print(f"[INFO] Capped high prediction. Original: {original_pred:.2f}, Capped to: {prediction:.2f} (baseline: {baseline:.2f})")
+    elif recent_avg > 0:
+        # Fallback if baseline is 0 but we have recent data
+        if prediction > recent_avg * 2:
+            original_pred = prediction
+            prediction = recent_avg * 1.2
+            print(f"[INFO] Capped using recent avg. Original: {original_pred:.2f}, Capped to: {prediction:.2f} (recent avg: {recent_avg:.2f})")
     
-    if rf_model is None:
-        rf_model = load_rf_model()
+    return prediction
+
+def predict_rf(features, historical_data=None, stats=None, model=None):
+    """Make prediction using Random Forest model (or the registry `model` given).
+    Capping uses `stats` when given, otherwise the last 7 days of historical_data.
+    """
+    if model is None:
+        model = load_rf_model()
     
-    if rf_model is None:
+    if model is None:
         return None
     
     try:
         # Check feature count matches model expectations
-        if hasattr(rf_model, 'n_features_in_'):
-            expected_features = rf_model.n_features_in_
+        if hasattr(model, 'n_features_in_'):
+            expected_features = model.n_features_in_
             actual_features = features.shape[1]
             if expected_features != actual_features:
                 print(f"[ERROR] Feature mismatch! Model expects {expected_features} features, got {actual_features}")
                 print(f"[INFO] Features: {features}")
                 return None
         
-        prediction = rf_model.predict(features)[0]
+        prediction = model.predict(features)[0]
         prediction = float(prediction)
         
         # Ensure finite and non-negative
@@ -315,32 +584,9 @@ def predict_rf(features, historical_data=None):
             prediction = 0.0
         
         # Cap unrealistic predictions MUCH more aggressively
-        if historical_data and len(historical_data) >= 7:
-            recent_avg = np.mean(historical_data[-7:])
-            recent_max = np.max(historical_data[-7:])
-            recent_median = np.median(historical_data[-7:])
-            
-            # Use the median or max as baseline (more stable than average)
-            baseline = max(recent_median, recent_max * 0.8) if recent_max > 0 else recent_avg
-            
-            # If prediction is more than 2x the baseline, cap it very aggressively
-            if baseline > 0:
-                if prediction > baseline * 2:
-                    # Cap to baseline + 20% (very conservative)
-                    original_pred = prediction
-                    prediction = baseline * 1.2
-                    print(f"[INFO] Capped unrealistic prediction. Original: {original_pred:.2f}, Capped to: {prediction:.2f} (baseline: {baseline:.2f}, recent avg: {recent_avg:.2f}, recent max: {recent_max:.2f})")
-                elif prediction > baseline * 1.5:
-                    # If between 1.5x-2x baseline, cap to baseline + 10%
-                    original_pred = prediction
-                    prediction = baseline * 1.1
-                    print(f"[INFO] Capped high prediction. Original: {original_pred:.2f}, Capped to: {prediction:.2f} (baseline: {baseline:.2f})")
-            elif recent_avg > 0:
-                # Fallback if baseline is 0 but we have recent data
-                if prediction > recent_avg * 2:
-                    original_pred = prediction
-                    prediction = recent_avg * 1.2
-                    print(f"[INFO] Capped using recent avg. Original: {original_pred:.2f}, Capped to: {prediction:.2f} (recent avg: {recent_avg:.2f})")
+        if stats is None:
+            stats = recent_stats(historical_data)
+        prediction = cap_prediction(prediction, stats)
         
         return prediction
     except Exception as e:
@@ -351,20 +597,513 @@ def predict_rf(features, historical_data=None):
         traceback.print_exc()
         return None
 
-@app.route('/health', methods=['GET'])
+def explain_features(features, model=None):
+    """(explanations, error) for each row of a feature matrix.
+    Explanations attribute the raw model output (before capping) to the 28 features."""
+    if model is None:
+        model = load_rf_model()
+    if model is None:
+        return None, 'Random Forest model not available'
+    try:
+        return explain_rows(model, features), None
+    except ValueError as e:
+        return None, str(e)
+
+def forecast_limits(data):
+    """(steps, Deadline) for a forecast request. The deadline starts now and is
+    `deadlineMs` from the body, capped at MAX_FORECAST_DEADLINE_SECONDS.
+    Raises ValueError on malformed input or a horizon above MAX_FORECAST_STEPS."""
+    try:
+        steps = int(data.get('steps', DEFAULT_FORECAST_STEPS))
+    except (TypeError, ValueError):
+        raise ValueError('steps must be an integer')
+    if not 1 <= steps <= MAX_FORECAST_STEPS:
+        raise ValueError(f'steps must be between 1 and {MAX_FORECAST_STEPS}')
+    
+    seconds = FORECAST_DEADLINE_SECONDS
+    deadline_ms = data.get('deadlineMs')
+    if deadline_ms not in (None, ''):
+        try:
+            seconds = float(deadline_ms) / 1000.0
+        except (TypeError, ValueError):
+            raise ValueError('deadlineMs must be a number')
+        if not np.isfinite(seconds) or seconds <= 0:
+            raise ValueError('deadlineMs must be positive')
+    return steps, Deadline(min(seconds, MAX_FORECAST_DEADLINE_SECONDS))
+
+def run_recursive_forecast(data, historical_data, start_date, steps, feature_rows=None, model=None,
+                           deadline=None):
+    """Recursive multi-step forecast starting at start_date.
+    Each prediction is pushed into a RollingForecastState so the per-step cost
+    is the model call, not rebuilding lags and rolling windows from a list.
+    When `feature_rows` is a list, each step's feature row is appended to it.
+    Stops early, returning the steps made so far, once `deadline` has expired
+    (after the first step, which always runs).
+    """
+    if model is None:
+        model = load_rf_model()
+    
+    state = RollingForecastState(historical_data if historical_data else [0.0] * 30)
+    region = data.get('region', 'Central')
+    district = data.get('district', '')
+    current_date = datetime(start_date.year, start_date.month, start_date.day)
+    one_day = timedelta(days=1)
+    
+    forecasts = []
+    for step in range(steps):
+        # The first step always runs, so a budget spent on loading still returns a forecast
+        if step and deadline is not None and deadline.expired():
+            print(f"[WARNING] Forecast deadline of {deadline.seconds:.2f}s reached after {step} of {steps} steps")
+            break
+        
+        features = state.features(current_date, region, district)
+        prediction = predict_rf(features, stats=state.recent_stats(), model=model) if model is not None else None
+        
+        if prediction is None:
+            print(f"[ERROR] Prediction returned None at step {step + 1}")
+            # Try to get more info about the model
+            if model is None:
+                print("[ERROR] Model is None")
+            else:
+                print(f"[INFO] Model type: {type(model)}")
+                print(f"[INFO] Model n_features_in_: {getattr(model, 'n_features_in_', 'unknown')}")
+                print(f"[INFO] Features shape: {features.shape}")
+            break
+        
+        # Ensure finite and non-negative
+        prediction = float(prediction)
+        if not np.isfinite(prediction) or prediction < 0:
+            prediction = 0.0
+        
+        if feature_rows is not None:
+            feature_rows.append(features.copy())
+        state.append(prediction)
+        
+        # A step is labelled with the day its features were built for
+        forecasts.append({
+            'date': current_date.strftime('%Y-%m-%d'),
+            'predicted': prediction,
+            'step': step + 1
+        })
+        current_date += one_day
+    
+    return forecasts
+
+def cap_predictions(predictions, stats):
+    """Vectorized cap_prediction over a batch.
+    `stats` is (avg, max, median, enabled) with one entry per row.
+    """
+    recent_avg, recent_max, recent_median, enabled = stats
+    baseline = np.where(recent_max > 0, np.maximum(recent_median, recent_max * 0.8), recent_avg)
+    
+    capped = predictions.copy()
+    use_baseline = enabled & (baseline > 0)
+    capped = np.where(use_baseline & (predictions > baseline * 2), baseline * 1.2, capped)
+    capped = np.where(use_baseline & (predictions > baseline * 1.5) & (predictions <= baseline * 2), baseline * 1.1, capped)
+    
+    # Fallback if baseline is 0 but we have recent data
+    use_avg = enabled & ~(baseline > 0) & (recent_avg > 0)
+    capped = np.where(use_avg & (predictions > recent_avg * 2), recent_avg * 1.2, capped)
+    return capped
+
+def predict_rf_batch(features, stats, model=None):
+    """Predict every row of a feature matrix with one model call, then cap."""
+    if model is None:
+        model = load_rf_model()
+    
+    if model is None:
+        return None
+    
+    try:
+        if hasattr(model, 'n_features_in_') and model.n_features_in_ != features.shape[1]:
+            print(f"[ERROR] Feature mismatch! Model expects {model.n_features_in_} features, got {features.shape[1]}")
+            return None
+        
+        predictions = np.asarray(model.predict(features), dtype=float)
+        
+        # Ensure finite and non-negative
+        predictions = np.where(np.isfinite(predictions) & (predictions >= 0), predictions, 0.0)
+        return cap_predictions(predictions, stats)
+    except Exception as e:
+        print(f"[ERROR] Error making batched Random Forest prediction: {str(e)}")
+        print(f"[INFO] Features shape: {features.shape}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def build_scenarios(data):
+    """Expand the request's `scenarios` list and/or `grid` into scenario dicts.
+    
+    Each scenario may set:
+      scale     - multiplier applied to the last `window` days of history
+      shift     - cases added to each of the last `window` days
+      window    - number of recent days perturbed (default 7)
+      startDate - first forecast date (default: day after last dataset date)
+    `grid` takes lists for scale / shift / startDate and expands their product.
+    Raises ValueError on malformed input.
+    """
+    scenarios = data.get('scenarios') or []
+    if not isinstance(scenarios, list):
+        raise ValueError('scenarios must be a list')
+    scenarios = list(scenarios)
+    
+    grid = data.get('grid')
+    if grid:
+        if not isinstance(grid, dict):
+            raise ValueError('grid must be an object')
+        axes = {}
+        for axis, default in (('scale', [1.0]), ('shift', [0.0]), ('startDate', [None])):
+            values = grid.get(axis) or default
+            if not isinstance(values, list):
+                raise ValueError(f'grid.{axis} must be a list')
+            axes[axis] = values
+        # Check the size before expanding, so a huge grid is rejected cheaply
+        size = len(axes['scale']) * len(axes['shift']) * len(axes['startDate'])
+        if len(scenarios) + size > MAX_SCENARIOS:
+            raise ValueError(f'Too many scenarios ({len(scenarios) + size}); maximum is {MAX_SCENARIOS}')
+        window = grid.get('window', 7)
+        for scale, shift, start in itertools.product(axes['scale'], axes['shift'], axes['startDate']):
+            scenarios.append({'scale': scale, 'shift': shift, 'startDate': start, 'window': window})
+    
+    if not scenarios:
+        scenarios = [{'scale': scale} for scale in DEFAULT_SCENARIO_SCALES]
+    
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f'Too many scenarios ({len(scenarios)}); maximum is {MAX_SCENARIOS}')
+    
+    cleaned = []
+    for i, scenario in enumerate(scenarios):
+        if not isinstance(scenario, dict):
+            raise ValueError(f'Scenario {i} must be an object')
+        try:
+            scale = float(scenario.get('scale', 1.0))
+            shift = float(scenario.get('shift', 0.0))
+            window = int(scenario.get('window', 7))
+        except (TypeError, ValueError):
+            raise ValueError(f'Scenario {i} has a non-numeric scale, shift or window')
+        if not np.isfinite(scale) or not np.isfinite(shift) or scale < 0 or window < 0:
+            raise ValueError(f'Scenario {i} has an invalid scale, shift or window')
+        
+        start = scenario.get('startDate')
+        if start:
+            try:
+                start = datetime.strptime(start, '%Y-%m-%d').strftime('%Y-%m-%d')
+            except (TypeError, ValueError):
+                raise ValueError(f'Scenario {i} startDate must be YYYY-MM-DD')
+        
+        name = scenario.get('name')
+        if not name:
+            parts = [f'x{scale:g}']
+            if shift:
+                parts.append(f'{shift:+g}')
+            if start:
+                parts.append(f'from {start}')
+            name = ' '.join(parts)
+        
+        cleaned.append({'name': name, 'scale': scale, 'shift': shift, 'window': window, 'startDate': start or None})
+    
+    return cleaned
+
+def apply_perturbation(history, scenario):
+    """Return a copy of history with the scenario's scale/shift applied to the last `window` days."""
+    history = list(history)
+    window = min(scenario['window'], len(history))
+    if window:
+        for i in range(len(history) - window, len(history)):
+            history[i] = max(float(history[i]) * scenario['scale'] + scenario['shift'], 0.0)
+    return history
+
+def run_batched_forecast(data, histories, start_dates, steps, model=None, deadline=None):
+    """Recursive forecast for several histories at once.
+    Every step builds one feature matrix and makes a single model call across
+    all rows. Returns one forecast list per history, cut short once `deadline` has expired
+    (after the first step, which always runs).
+    """
+    state = BatchForecastState([h if h else [0.0] * 30 for h in histories])
+    region = data.get('region', 'Central')
+    district = data.get('district', '')
+    dates = pd.DatetimeIndex(pd.to_datetime(start_dates)).normalize()
+    one_day = pd.Timedelta(days=1)
+    
+    forecasts = [[] for _ in histories]
+    for step in range(steps):
+        # As in run_recursive_forecast, the first step always runs
+        if step and deadline is not None and deadline.expired():
+            print(f"[WARNING] Scenario deadline of {deadline.seconds:.2f}s reached after {step} of {steps} steps")
+            break
+        
+        features = state.features(dates, region, district)
+        predictions = predict_rf_batch(features, state.recent_stats(), model=model)
+        
+        if predictions is None:
+            print(f"[ERROR] Batched prediction returned None at step {step + 1}")
+            break
+        
+        state.append(predictions)
+        
+        labels = dates.strftime('%Y-%m-%d')
+        for i, rows in enumerate(forecasts):
+            rows.append({
+                'date': labels[i],
+                'predicted': float(predictions[i]),
+                'step': step + 1
+            })
+        dates = dates + one_day
+    
+    return forecasts
+
+def scenario_histories(scenarios, region, district, last_dataset_date, base_history=None):
+    """Perturbed history and start date for each scenario.
+    Scenarios without a startDate forecast from the day after last_dataset_date
+    using base_history (or the dataset); the others use the 60 days before their start.
+    """
+    default_start = pd.to_datetime(last_dataset_date) + timedelta(days=1)
+    sequences = {}
+    histories, start_dates = [], []
+    for scenario in scenarios:
+        start = pd.to_datetime(scenario['startDate']) if scenario['startDate'] else default_start
+        key = start.strftime('%Y-%m-%d')
+        if key not in sequences:
+            if base_history and start == default_start:
+                sequences[key] = list(base_history)
+            else:
+                end_date = (start - timedelta(days=1)).strftime('%Y-%m-%d')
+                sequences[key], _ = get_historical_sequence(region=region, district=district, end_date=end_date, sequence_length=60)
+        histories.append(apply_perturbation(sequences[key], scenario))
+        start_dates.append(start)
+    return histories, start_dates
+
+def current_dataset_version():
+    """Version of the dataset being served: the partitions' version, else the CSV hash."""
+    parts = load_partitions()
+    if parts is not None:
+        return parts.manifest['version']
+    return csv_dataset_version()
+
+def alert_params(query):
+    """Scan parameters from the query string. Raises ValueError on malformed input."""
+    query = query or {}
+    try:
+        params = {
+            'weeks': int(query.get('weeks', DEFAULT_WEEKS)),
+            'min_cases': float(query.get('minCases', DEFAULT_MIN_CASES)),
+            'z_threshold': float(query.get('zThreshold', DEFAULT_Z_THRESHOLD)),
+            'growth_threshold': float(query.get('growthThreshold', DEFAULT_GROWTH_THRESHOLD)),
+        }
+        limit = query.get('limit')
+        limit = int(limit) if limit not in (None, '') else None
+    except (TypeError, ValueError):
+        raise ValueError('weeks, minCases, zThreshold, growthThreshold and limit must be numeric')
+    if not 2 <= params['weeks'] <= MAX_ALERT_WEEKS:
+        raise ValueError(f'weeks must be between 2 and {MAX_ALERT_WEEKS}')
+    if not all(np.isfinite(v) for v in params.values()) or (limit is not None and limit < 0):
+        raise ValueError('Invalid scan parameters')
+    
+    date = query.get('date')
+    if date:
+        try:
+            date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError('date must be YYYY-MM-DD')
+    params['date'] = date or None
+    params['predict'] = str(query.get('predict', '')).strip().lower() in ('1', 'true', 'yes')
+    params['limit'] = limit
+    
+    params['model'] = None
+    if params['predict']:
+        try:
+            name, version = get_model_registry().resolve(query.get('model'))
+        except KeyError as e:
+            raise ValueError(e.args[0])
+        params['model'] = f'{name}:{version}'
+    return params
+
+def predict_next_day(alerts, as_of, model_spec=None):
+    """Batched one-step forecast for the alerted districts, as the forecast endpoint would make it.
+    Features come from the feature store when it is built, else from each district's history.
+    Adds `predicted_next_day` to each alert; returns False when the model is unavailable."""
+    if not alerts:
+        return False
+    model = load_rf_model(model_spec)
+    if model is None:
+        return False
+    
+    store = load_feature_store()
+    next_day = (as_of + timedelta(days=1)).strftime('%Y-%m-%d')
+    rows, stats = [], []
+    for alert in alerts:
+        if store is not None:
+            row, cap = store.lookup(alert['region'], alert['district'], as_of, next_day)
+        else:
+            history, _ = get_historical_sequence(region=alert['region'], district=alert['district'], end_date=as_of)
+            row = prepare_features({'date': next_day, 'region': alert['region'], 'district': alert['district']}, history)
+            cap = recent_stats(history) or (0.0, 0.0, 0.0)
+        rows.append(row)
+        stats.append(cap)
+    
+    stats = np.asarray(stats, dtype=float)
+    predictions = predict_rf_batch(np.vstack(rows), (stats[:, 0], stats[:, 1], stats[:, 2],
+                                                     np.ones(len(alerts), dtype=bool)), model=model)
+    if predictions is None:
+        return False
+    for alert, prediction in zip(alerts, predictions):
+        alert['predicted_next_day'] = float(prediction)
+    return True
+
+def district_alerts(params):
+    """Ranked district alerts for the scan parameters, cached per dataset version.
+    Returns (result dict, error message)."""
+    version = current_dataset_version()
+    last_date = dataset_last_date()
+    if version is None or last_date is None:
+        return None, 'Dataset not available'
+    
+    as_of = pd.to_datetime(params['date'] or last_date).normalize()
+    key = (version, as_of.strftime('%Y-%m-%d'), params['weeks'], params['min_cases'],
+           params['z_threshold'], params['growth_threshold'], params['predict'], params['model'])
+    
+    with alerts_cache_lock:
+        result = alerts_cache.get(key)
+    if result is None:
+        df = load_location_frame()
+        if df is None:
+            return None, 'Dataset not available'
+        
+        alerts = scan(df, as_of, weeks=params['weeks'], min_cases=params['min_cases'],
+                      z_threshold=params['z_threshold'], growth_threshold=params['growth_threshold'])
+        predicted = predict_next_day(alerts, as_of, params['model']) if params['predict'] else False
+        result = {
+            'as_of': as_of.strftime('%Y-%m-%d'),
+            'dataset_version': version,
+            'weeks': params['weeks'],
+            'alerts': alerts,
+            'total': len(alerts),
+            'predicted': predicted,
+            'model': params['model'],
+        }
+        
+        with alerts_cache_lock:
+            # A new dataset version makes every cached scan stale
+            if any(k[0] != version for k in alerts_cache) or len(alerts_cache) >= ALERTS_CACHE_SIZE:
+                alerts_cache.clear()
+            alerts_cache[key] = result
+    
+    if params['limit'] is not None:
+        result = dict(result, alerts=result['alerts'][:params['limit']])
+    return result, None
+
+def series_params(query):
+    """Series request from the query string. Raises ValueError on malformed input."""
+    query = query or {}
+    try:
+        points = int(query.get('points', DEFAULT_SERIES_POINTS))
+    except (TypeError, ValueError):
+        raise ValueError('points must be an integer')
+    if not 3 <= points <= MAX_SERIES_POINTS:
+        raise ValueError(f'points must be between 3 and {MAX_SERIES_POINTS}')
+    
+    metrics = [m.strip() for m in str(query.get('metrics') or 'sCh').split(',') if m.strip()]
+    unknown = [m for m in metrics if m not in SERIES_METRICS]
+    if unknown or not metrics:
+        raise ValueError(f"metrics must be a comma-separated subset of {', '.join(SERIES_METRICS)}")
+    
+    params = {'region': query.get('region') or None, 'district': query.get('district') or None,
+              'metrics': metrics, 'points': points}
+    for name in ('start', 'end'):
+        value = query.get(name)
+        if value:
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+            except (TypeError, ValueError):
+                raise ValueError(f'{name} must be YYYY-MM-DD')
+        params[name] = value or None
+    return params
+
+def daily_totals(region=None, district=None, start=None, end=None):
+    """Daily sums of SERIES_METRICS for a location and date range (reported days only)."""
+    df = load_location_frame(region, district)
+    if df is None:
+        return None
+    if region and 'Region' in df.columns:
+        df = df[df['Region'] == region]
+    if district and 'District' in df.columns:
+        df = df[df['District'] == district]
+    if start:
+        df = df[df['reporting_date'] >= pd.to_datetime(start)]
+    if end:
+        df = df[df['reporting_date'] <= pd.to_datetime(end)]
+    
+    columns = [col for col in SERIES_METRICS if col in df.columns]
+    return df.groupby('reporting_date', sort=True)[columns].sum()
+
+def downsampled_series(params):
+    """Each requested metric reduced to the point budget with LTTB, cached per
+    (dataset version, location, metric, range, budget). Returns (result dict, error message)."""
+    version = current_dataset_version()
+    if version is None:
+        return None, 'Dataset not available'
+    
+    location = (params['region'], params['district'], params['start'], params['end'])
+    keys = {metric: (version,) + location + (metric, params['points']) for metric in params['metrics']}
+    
+    series = {}
+    missing = []
+    with series_cache_lock:
+        for metric, key in keys.items():
+            if key in series_cache:
+                series_cache.move_to_end(key)
+                series[metric] = series_cache[key]
+            else:
+                missing.append(metric)
+    
+    if missing:
+        totals = daily_totals(*location)
+        if totals is None:
+            return None, 'Dataset not available'
+        
+        # x is days since the epoch, so gaps between reports keep their width
+        days = totals.index.values.astype('datetime64[D]')
+        x = days.astype(np.int64).astype(float)
+        for metric in missing:
+            values = totals[metric].to_numpy(dtype=float) if metric in totals.columns else np.zeros(len(x))
+            values = np.where(np.isfinite(values), values, 0.0)
+            keep = lttb_indices(x, values, params['points'])
+            series[metric] = {
+                'dates': [str(d) for d in days[keep]],
+                'values': [float(v) for v in values[keep]],
+                'original_points': int(len(x)),
+            }
+        
+        with series_cache_lock:
+            for metric in missing:
+                series_cache[keys[metric]] = series[metric]
+            while len(series_cache) > SERIES_CACHE_SIZE:
+                series_cache.popitem(last=False)
+    
+    return {
+        'region': params['region'],
+        'district': params['district'],
+        'start': params['start'],
+        'end': params['end'],
+        'points': params['points'],
+        'dataset_version': version,
+        'series': series,
+    }, None
+
+@route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
     model_status = "available" if os.path.exists(RF_MODEL_PATH) else "unavailable"
     dataset_status = "available" if os.path.exists(CSV_DATA_PATH) else "unavailable"
     
     dataset_loaded = False
-    dataset_records = 0
+    records = 0
     if dataset_status == "available":
         try:
-            df = load_cholera_dataset()
-            if df is not None:
+            n = dataset_records()
+            if n is not None:
                 dataset_loaded = True
-                dataset_records = len(df)
+                records = n
         except:
             pass
     
@@ -374,12 +1113,13 @@ def health():
         'model_type': 'Random Forest',
         'dataset': dataset_status,
         'dataset_loaded': dataset_loaded,
-        'dataset_records': dataset_records,
+        'dataset_records': records,
         'model_path': RF_MODEL_PATH,
+        'models': get_model_registry().available(),
         'dataset_path': CSV_DATA_PATH
     })
 
-@app.route('/api/lstm/predict', methods=['POST'])
+@route('/api/lstm/predict', methods=['POST'])
 def predict():
     """Single prediction endpoint (kept same endpoint name for UI compatibility)."""
     try:
@@ -388,20 +1128,37 @@ def predict():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        try:
+            model, model_name = select_model(data.get('model'))
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 400
+        if model is None:
+            return jsonify({'error': f'Model {model_name} not available', 'model': model_name}), 503
+        
         # Get historical data from dataset if not provided
         historical_data = data.get('historicalSuspected', [])
+        features = None
+        historical_data_points = len(historical_data)
         if not historical_data or len(historical_data) == 0:
             region = data.get('region', 'Central')
             district = data.get('district')
-            end_date = data.get('date', datetime.now().strftime('%Y-%m-%d'))
-            historical_data, _ = get_historical_sequence(region=region, district=district, end_date=end_date)
-            print(f"Auto-loaded {len(historical_data)} days of historical data for {region}")
+            end_date = prediction_history_end(data)
+            # Historical dates are a feature store lookup
+            stored = historical_features(data, end_date)
+            if stored is not None:
+                features, _ = stored
+                historical_data_points = HISTORY_WINDOW
+            else:
+                historical_data, _ = get_historical_sequence(region=region, district=district, end_date=end_date)
+                historical_data_points = len(historical_data)
+                print(f"Auto-loaded {len(historical_data)} days of historical data for {region}")
         
         # Prepare features
-        features = prepare_features(data, historical_data)
+        if features is None:
+            features = prepare_features(data, historical_data)
         
         # Make prediction
-        prediction = predict_rf(features)
+        prediction = predict_rf(features, model=model)
         
         if prediction is None:
             return jsonify({
@@ -414,9 +1171,10 @@ def predict():
         hum = float(data.get('humidity', 70.0)) if np.isfinite(data.get('humidity', 70.0)) else 70.0
         precip = float(data.get('precipitation', 0.0)) if np.isfinite(data.get('precipitation', 0.0)) else 0.0
         
-        return jsonify({
+        response = {
             'prediction': prediction,
             'model_type': 'Random Forest',
+            'model': model_name,
             'timestamp': datetime.now().isoformat(),
             'input_features': {
                 'date': data.get('date'),
@@ -425,34 +1183,51 @@ def predict():
                 'humidity': hum,
                 'precipitation': precip,
             },
-            'historical_data_points': len(historical_data)
-        })
+            'historical_data_points': historical_data_points
+        }
+        
+        if explain_requested(data, request.args):
+            explanations, error = explain_features(features, model=model)
+            response['explanation'] = explanations[0] if explanations else None
+            if error:
+                response['explanation_error'] = error
+        
+        return jsonify(response)
     
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/lstm/forecast', methods=['POST'])
+@route('/api/lstm/forecast', methods=['POST'])
 def forecast():
     """Generate multi-step forecast using Random Forest."""
     try:
         data = request.json
-        steps = data.get('steps', 14)  # Default 14-day forecast
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        try:
+            steps, deadline = forecast_limits(data)  # Default 14-day forecast
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            model, model_name = select_model(data.get('model'))
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 400
+        if model is None:
+            return jsonify({'error': f'Model {model_name} not available', 'model': model_name}), 503
+        
         # Get historical data from dataset if not provided
         historical_data = data.get('historicalSuspected', [])
         
         # ALWAYS get the actual last date from the entire dataset first (not filtered)
-        df = load_cholera_dataset()
-        if df is None or len(df) == 0:
+        last_dataset_date = dataset_last_date()
+        if last_dataset_date is None:
             return jsonify({'error': 'Dataset not available'}), 503
         
-        # Get the absolute last date from the ENTIRE dataset (not filtered by region)
-        last_dataset_date = df['reporting_date'].max()
         print(f"[INFO] Last date in ENTIRE dataset: {last_dataset_date}")
         
         region = data.get('region', 'Central')
@@ -467,56 +1242,19 @@ def forecast():
                 print(f"Recent historical values (last 7): {[round(x, 2) for x in historical_data[-7:]]}")
                 print(f"Recent max: {max(historical_data[-7:])}, Recent avg: {np.mean(historical_data[-7:]):.2f}")
         
-        forecasts = []
-        
-        # Use iterative forecasting
-        current_history = historical_data.copy() if historical_data else [0.0] * 30
-        current_data = data.copy()
-        
         # ALWAYS start from the day after the last date in ENTIRE dataset (not filtered)
         start_date = pd.to_datetime(last_dataset_date) + timedelta(days=1)
-        current_data['date'] = start_date.strftime('%Y-%m-%d')
         print(f"[INFO] Starting forecast from {start_date.strftime('%Y-%m-%d')} (day after last dataset date: {last_dataset_date.strftime('%Y-%m-%d')})")
         
-        for step in range(steps):
-            # Prepare features with current history
-            features = prepare_features(current_data, current_history)
-            
-            # Predict next value
-            prediction = predict_rf(features, current_history)
-            
-            if prediction is None:
-                print(f"[ERROR] Prediction returned None at step {step + 1}")
-                # Try to get more info about the model
-                if rf_model is None:
-                    print("[ERROR] Model is None - attempting to reload")
-                    rf_model = load_rf_model()
-                if rf_model is not None:
-                    print(f"[INFO] Model type: {type(rf_model)}")
-                    print(f"[INFO] Model n_features_in_: {getattr(rf_model, 'n_features_in_', 'unknown')}")
-                    print(f"[INFO] Features shape: {features.shape}")
-                break
-            
-            # Ensure finite and non-negative
-            prediction = float(prediction)
-            if not np.isfinite(prediction) or prediction < 0:
-                prediction = 0.0
-            
-            # Add prediction to history
-            current_history.append(prediction)
-            if len(current_history) > 60:
-                current_history = current_history[-60:]
-            
-            # Update date for next prediction
-            current_date = datetime.strptime(current_data.get('date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d')
-            current_date += timedelta(days=1)
-            current_data['date'] = current_date.strftime('%Y-%m-%d')
-            
-            forecasts.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'predicted': prediction,
-                'step': step + 1
-            })
+        # Use iterative forecasting
+        explain = explain_requested(data, request.args)
+        feature_rows = [] if explain else None
+        try:
+            with forecast_limiter.slot(deadline):
+                forecasts = run_recursive_forecast(data, historical_data, start_date, steps, feature_rows=feature_rows,
+                                                   model=model, deadline=deadline)
+        except Overloaded as e:
+            return jsonify({'error': str(e)}), e.status, {'Retry-After': str(e.retry_after)}
         
         if not forecasts:
             return jsonify({
@@ -538,11 +1276,81 @@ def forecast():
                 'step': f.get('step')
             })
         
-        return jsonify({
+        response = {
             'forecast': cleaned_forecasts,
             'model_type': 'Random Forest',
+            'model': model_name,
+            'timestamp': datetime.now().isoformat(),
+            'historical_data_points': len(historical_data),
+            'requested_steps': steps,
+            'partial': len(cleaned_forecasts) < steps
+        }
+        
+        # One batched attribution for every step of the forecast
+        if explain and feature_rows:
+            explanations, error = explain_features(np.vstack(feature_rows), model=model)
+            for f, e in zip(cleaned_forecasts, explanations or []):
+                f['explanation'] = e
+            if error:
+                response['explanation_error'] = error
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@route('/api/lstm/scenarios', methods=['POST'])
+def scenarios():
+    """What-if sweep: forecast several perturbed histories in one batched run."""
+    try:
+        data = request.json
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        try:
+            steps, deadline = forecast_limits(data)
+            scenario_list = build_scenarios(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            model, model_name = select_model(data.get('model'))
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 400
+        if model is None:
+            return jsonify({'error': f'Model {model_name} not available', 'model': model_name}), 503
+        
+        last_dataset_date = dataset_last_date()
+        if last_dataset_date is None:
+            return jsonify({'error': 'Dataset not available'}), 503
+        
+        region = data.get('region', 'Central')
+        district = data.get('district')
+        
+        histories, start_dates = scenario_histories(scenario_list, region, district, last_dataset_date,
+                                                    base_history=data.get('historicalSuspected'))
+        try:
+            with forecast_limiter.slot(deadline):
+                forecasts = run_batched_forecast(data, histories, start_dates, steps, model=model, deadline=deadline)
+        except Overloaded as e:
+            return jsonify({'error': str(e)}), e.status, {'Retry-After': str(e.retry_after)}
+        
+        if not any(forecasts):
+            return jsonify({
+                'error': 'Scenario forecast generation failed',
+                'model_available': os.path.exists(RF_MODEL_PATH)
+            }), 503
+        
+        return jsonify({
+            'scenarios': [dict(scenario, forecast=rows) for scenario, rows in zip(scenario_list, forecasts)],
+            'model_type': 'Random Forest',
+            'model': model_name,
             'timestamp': datetime.now().isoformat(),
-            'historical_data_points': len(historical_data)
+            'steps': steps,
+            'partial': len(forecasts[0]) < steps
         })
     
     except Exception as e:
@@ -550,6 +1358,46 @@ def forecast():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@route('/api/alerts', methods=['GET'])
+def alerts():
+    """Districts with a developing surge, ranked by severity."""
+    try:
+        try:
+            params = alert_params(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result, error = district_alerts(params)
+        if error:
+            return jsonify({'error': error}), 503
+        
+        return jsonify(dict(result, model_type='Random Forest', timestamp=datetime.now().isoformat()))
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@route('/api/series', methods=['GET'])
+def daily_series_endpoint():
+    """Region/district daily series downsampled to a point budget for charts."""
+    try:
+        try:
+            params = series_params(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result, error = downsampled_series(params)
+        if error:
+            return jsonify({'error': error}), 503
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
     print(f"\n{'='*60}")
@@ -560,14 +1408,19 @@ if __name__ == '__main__':
     print(f"Dataset Path: {CSV_DATA_PATH}")
     print(f"Dataset Exists: {os.path.exists(CSV_DATA_PATH)}")
     
-    # Pre-load dataset
+    # Pre-load dataset and build the partitions and feature store before serving
     print("\nPre-loading dataset...")
     load_cholera_dataset()
+    load_partitions(build=True)
+    load_feature_store(build=True)
     
     print(f"\nAPI ready! Endpoints:")
     print(f"  - Health: http://localhost:{port}/health")
     print(f"  - Predict: http://localhost:{port}/api/lstm/predict")
     print(f"  - Forecast: http://localhost:{port}/api/lstm/forecast")
+    print(f"  - Scenarios: http://localhost:{port}/api/lstm/scenarios")
+    print(f"  - Alerts: http://localhost:{port}/api/alerts")
+    print(f"  - Series: http://localhost:{port}/api/series")
     print(f"{'='*60}\n")
     
     app.run(host='0.0.0.0', port=port, debug=False)
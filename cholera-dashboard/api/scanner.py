@@ -0,0 +1,90 @@
+"""
+District surge scanner
+Flags districts with a developing surge in one vectorized pass over the
+dataset: suspected cases are summed into a (district x week) matrix ending on
+the as-of date, and every district's latest week is compared with its own
+baseline of the preceding weeks.
+
+For each district:
+    recent_cases   suspected cases in the latest 7 days
+    z_score        (recent - baseline mean) / max(baseline std, 1)
+    growth_rate    (recent - previous week) / max(previous week, 1)
+
+A district alerts when it has at least `min_cases` recent cases and either
+its z-score or its growth rate crosses the threshold.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_WEEKS = 12
+DEFAULT_MIN_CASES = 5
+DEFAULT_Z_THRESHOLD = 2.0
+DEFAULT_GROWTH_THRESHOLD = 1.0
+
+LEVEL_ORDER = {'high': 0, 'medium': 1, 'watch': 2}
+
+
+def weekly_matrix(df, as_of, weeks=DEFAULT_WEEKS):
+    """(keys, matrix) of weekly suspected cases per (Region, District).
+
+    matrix has weeks + 1 columns, oldest first; the last column is the 7 days
+    ending on `as_of`.
+    """
+    as_of = pd.Timestamp(as_of).normalize()
+    days = 7 * (weeks + 1)
+    start = as_of - pd.Timedelta(days=days - 1)
+    window = df[(df['reporting_date'] >= start) & (df['reporting_date'] <= as_of)]
+    window = window.dropna(subset=['Region', 'District'])
+    if len(window) == 0:
+        return [], np.zeros((0, weeks + 1))
+
+    days_back = (as_of - window['reporting_date'].dt.normalize()).dt.days
+    week = weeks - (days_back // 7)
+    totals = (window.assign(week=week.values)
+              .groupby(['Region', 'District', 'week'])['sCh'].sum()
+              .unstack(fill_value=0.0)
+              .reindex(columns=range(weeks + 1), fill_value=0.0))
+    return list(totals.index), totals.to_numpy(dtype=float)
+
+
+def scan(df, as_of, weeks=DEFAULT_WEEKS, min_cases=DEFAULT_MIN_CASES,
+         z_threshold=DEFAULT_Z_THRESHOLD, growth_threshold=DEFAULT_GROWTH_THRESHOLD):
+    """Ranked alert dicts for every district with a developing surge as of `as_of`."""
+    keys, matrix = weekly_matrix(df, as_of, weeks)
+    if not keys:
+        return []
+
+    matrix = np.where(np.isfinite(matrix) & (matrix >= 0), matrix, 0.0)
+    recent = matrix[:, -1]
+    previous = matrix[:, -2]
+    baseline = matrix[:, :-1]
+    baseline_mean = baseline.mean(axis=1)
+    baseline_std = baseline.std(axis=1)
+    z_score = (recent - baseline_mean) / np.maximum(baseline_std, 1.0)
+    growth_rate = (recent - previous) / np.maximum(previous, 1.0)
+
+    surging_z = z_score >= z_threshold
+    surging_growth = growth_rate >= growth_threshold
+    flagged = (recent >= min_cases) & (surging_z | surging_growth)
+    level = np.where(surging_z & surging_growth, 'high', np.where(surging_z, 'medium', 'watch'))
+
+    alerts = []
+    for i in np.flatnonzero(flagged):
+        region, district = keys[i]
+        alerts.append({
+            'region': region,
+            'district': district,
+            'level': str(level[i]),
+            'recent_cases': float(recent[i]),
+            'previous_week_cases': float(previous[i]),
+            'baseline_mean': float(baseline_mean[i]),
+            'baseline_std': float(baseline_std[i]),
+            'z_score': float(z_score[i]),
+            'growth_rate': float(growth_rate[i]),
+            'weekly_cases': [float(x) for x in matrix[i]],
+        })
+
+    alerts.sort(key=lambda a: (LEVEL_ORDER[a['level']], -a['z_score'], -a['recent_cases']))
+    for rank, alert in enumerate(alerts, start=1):
+        alert['rank'] = rank
+    return alerts
@@ -0,0 +1,140 @@
+"""
+Vercel Serverless Function - What-if scenario sweep endpoint
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.profiling import profiled_handler
+
+@profiled_handler
+def handler(request):
+    """Handle scenario sweep request"""
+    try:
+        from api.rf_predict import dataset_last_date, build_scenarios, scenario_histories, run_batched_forecast, select_model, forecast_limits, forecast_limiter
+        from api.admission import Overloaded
+        
+        # Parse request body
+        if isinstance(request.get('body'), str):
+            body = json.loads(request.get('body', '{}'))
+        else:
+            body = request.get('body', {})
+        
+        if not body:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                    'Access-Control-Allow-Headers': 'Content-Type'
+                },
+                'body': json.dumps({'error': 'No data provided'})
+            }
+        
+        try:
+            steps, deadline = forecast_limits(body)
+            scenario_list = build_scenarios(body)
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': str(e)})
+            }
+        
+        try:
+            model, model_name = select_model(body.get('model'))
+        except KeyError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': e.args[0]})
+            }
+        if model is None:
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': f'Model {model_name} not available', 'model': model_name})
+            }
+        
+        last_dataset_date = dataset_last_date()
+        if last_dataset_date is None:
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Dataset not available'})
+            }
+        
+        region = body.get('region', 'Central')
+        district = body.get('district')
+        
+        histories, start_dates = scenario_histories(scenario_list, region, district, last_dataset_date,
+                                                    base_history=body.get('historicalSuspected'))
+        try:
+            with forecast_limiter.slot(deadline):
+                forecasts = run_batched_forecast(body, histories, start_dates, steps, model=model, deadline=deadline)
+        except Overloaded as e:
+            return {
+                'statusCode': e.status,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Retry-After': str(e.retry_after)
+                },
+                'body': json.dumps({'error': str(e)})
+            }
+        
+        if not any(forecasts):
+            return {
+                'statusCode': 503,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Scenario forecast generation failed'})
+            }
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type'
+            },
+            'body': json.dumps({
+                'scenarios': [dict(scenario, forecast=rows) for scenario, rows in zip(scenario_list, forecasts)],
+                'model_type': 'Random Forest',
+                'model': model_name,
+                'timestamp': datetime.now().isoformat(),
+                'steps': steps,
+                'partial': len(forecasts[0]) < steps
+            })
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': str(e)})
+        }
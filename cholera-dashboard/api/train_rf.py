@@ -0,0 +1,195 @@
+"""
+Random Forest training pipeline
+Builds the 28-feature training matrix from cholera_data3.csv with the same
+feature code the API serves with (features.panel_features), trains the forest
+on all cores and writes the model together with a manifest of the feature
+order, data hash, parameters and holdout metrics.
+
+Each row is one (location, reporting date); its target is the suspected cases
+on the next reported day for that location, which is what the recursive
+forecast asks the model for. As at serving time, the calendar columns are
+those of the day being predicted, not of the last day of history
+(check_features.py verifies the parity).
+
+Usage:
+    python train_rf.py
+    python train_rf.py --data ../../cholera_data3.csv --output ../../random_forest_model.pkl --n-estimators 300
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.dataset import read_cholera_csv, read_cholera_csv_chunked
+from api.features import FEATURE_NAMES, N_FEATURES, clean_series, panel_features, set_calendar
+from api.feature_store import daily_series, dataset_version
+
+LEVELS = ('national', 'region', 'district')
+DEFAULT_LEVELS = ('region', 'district')
+
+
+def manifest_path(model_path):
+    """random_forest_model.pkl -> random_forest_model.manifest.json"""
+    return os.path.splitext(model_path)[0] + '.manifest.json'
+
+
+def load_manifest(model_path):
+    """The manifest written next to a trained model, or None."""
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _level(region, district):
+    if district:
+        return 'district'
+    return 'region' if region else 'national'
+
+
+def build_training_set(df, levels=DEFAULT_LEVELS):
+    """(X, y, target_dates) for every location at the requested levels.
+
+    Row i is what prepare_features produces for {'date': target_dates[i]} and a
+    history ending on the location's previous reported day: lags and windows come
+    from panel_features, the calendar columns from the target date. y is the
+    value reported on target_dates[i] (the last day of each location has no
+    target, so it is dropped).
+    """
+    unknown = set(levels) - set(LEVELS)
+    if unknown:
+        raise ValueError(f"Unknown level(s): {', '.join(sorted(unknown))}")
+
+    series = [
+        (region, district, dates, values)
+        for (region, district), (dates, values) in daily_series(df).items()
+        if _level(region, district) in levels
+    ]
+    rows, _, group = panel_features(series)
+    if len(rows) == 0:
+        return rows, np.zeros(0), np.zeros(0, dtype='datetime64[ns]')
+
+    values = clean_series(np.concatenate([np.asarray(s[3], dtype=float) for s in series]))
+    dates = np.concatenate([np.asarray(s[2], dtype='datetime64[ns]') for s in series])
+    has_next = np.append(group[1:] == group[:-1], False)
+    targets = np.append(values[1:], 0.0)
+    target_dates = np.append(dates[1:], dates[-1:])[has_next]
+    return set_calendar(rows[has_next], target_dates), targets[has_next], target_dates
+
+
+def _metrics(y_true, y_pred):
+    errors = y_pred - y_true
+    return {
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'n': int(len(y_true)),
+    }
+
+
+def train(data_path, output_path, levels=DEFAULT_LEVELS, n_estimators=100, max_depth=None,
+          min_samples_leaf=1, holdout=0.2, n_jobs=-1, random_state=42, chunk_rows=0):
+    """Train, evaluate on a temporal holdout, refit on all rows and save. Returns the manifest.
+    With chunk_rows > 0 the dataset is streamed in chunks of that many rows."""
+    from sklearn import __version__ as sklearn_version
+    from sklearn.ensemble import RandomForestRegressor
+    import joblib
+
+    started = time.perf_counter()
+    df = read_cholera_csv_chunked(data_path, chunk_rows) if chunk_rows > 0 else read_cholera_csv(data_path)
+    X, y, dates = build_training_set(df, levels)
+    if len(X) == 0:
+        raise ValueError(f'No training rows built from {data_path}')
+    print(f"[INFO] Training matrix: {X.shape[0]} rows x {X.shape[1]} features "
+          f"({time.perf_counter() - started:.2f}s)")
+
+    params = {
+        'n_estimators': n_estimators,
+        'max_depth': max_depth,
+        'min_samples_leaf': min_samples_leaf,
+        'random_state': random_state,
+        'n_jobs': n_jobs,
+    }
+
+    # Temporal holdout: the most recent `holdout` share of rows by date
+    metrics = {}
+    if 0 < holdout < 1:
+        cutoff = np.quantile(dates.astype('int64'), 1 - holdout)
+        train_mask = dates.astype('int64') <= cutoff
+        if train_mask.any() and (~train_mask).any():
+            model = RandomForestRegressor(**params).fit(X[train_mask], y[train_mask])
+            metrics['holdout'] = _metrics(y[~train_mask], model.predict(X[~train_mask]))
+            metrics['holdout']['from'] = str(dates[~train_mask].min())[:10]
+            print(f"[INFO] Holdout MAE {metrics['holdout']['mae']:.3f}, RMSE {metrics['holdout']['rmse']:.3f} "
+                  f"on {metrics['holdout']['n']} rows from {metrics['holdout']['from']}")
+
+    model = RandomForestRegressor(**params).fit(X, y)
+    metrics['train'] = _metrics(y, model.predict(X))
+
+    manifest = {
+        'model_type': type(model).__name__,
+        'feature_names': FEATURE_NAMES,
+        'n_features': N_FEATURES,
+        'target': 'sCh on the next reported day of the same location',
+        'levels': list(levels),
+        'data_path': os.path.basename(data_path),
+        'data_hash': dataset_version(data_path),
+        'data_last_date': str(dates.max())[:10],
+        'n_training_rows': int(len(X)),
+        'params': params,
+        'metrics': metrics,
+        'sklearn_version': sklearn_version,
+        'numpy_version': np.__version__,
+        'trained_at': datetime.now().isoformat(),
+        'training_seconds': round(time.perf_counter() - started, 3),
+    }
+
+    # Serving predicts a handful of rows per call, where a thread pool only adds overhead
+    model.set_params(n_jobs=None)
+
+    # Write both files beside their final names, then swap them in
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_model = output_path + '.tmp'
+    tmp_manifest = manifest_path(output_path) + '.tmp'
+    joblib.dump(model, tmp_model)
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_model, output_path)
+    os.replace(tmp_manifest, manifest_path(output_path))
+
+    print(f"[OK] Model written to {output_path} ({manifest['training_seconds']:.2f}s)")
+    return manifest
+
+
+def main(argv=None):
+    from api.rf_predict import CSV_DATA_PATH, RF_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description='Train the Random Forest model served by the API.')
+    parser.add_argument('--data', default=CSV_DATA_PATH, help='dataset CSV')
+    parser.add_argument('--output', default=RF_MODEL_PATH, help='model .pkl path (manifest goes beside it)')
+    parser.add_argument('--levels', default=','.join(DEFAULT_LEVELS),
+                        help=f"location levels to train on, from {', '.join(LEVELS)}")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--min-samples-leaf', type=int, default=1)
+    parser.add_argument('--holdout', type=float, default=0.2, help='share of most recent rows held out (0 to skip)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='cores used by the forest (-1 = all)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=0,
+                        help='stream the dataset in chunks of this many rows (for files too large to load whole)')
+    args = parser.parse_args(argv)
+
+    levels = tuple(level.strip() for level in args.levels.split(',') if level.strip())
+    train(args.data, args.output, levels=levels, n_estimators=args.n_estimators, max_depth=args.max_depth,
+          min_samples_leaf=args.min_samples_leaf, holdout=args.holdout, n_jobs=args.n_jobs,
+          random_state=args.seed, chunk_rows=args.chunk_rows)
+
+
+if __name__ == '__main__':
+    main()